@@ -23,7 +23,8 @@ import sys
 import os
 import pandas as pd
 import numpy as np
-import glob
+import json
+import hashlib
 import joblib  # For saving the trained models
 from sklearn.gaussian_process import GaussianProcessRegressor
 from sklearn.gaussian_process.kernels import Matern, WhiteKernel, ConstantKernel
@@ -32,6 +33,11 @@ from sklearn.metrics import r2_score
 from sklearn.preprocessing import MinMaxScaler
 from SALib.sample import saltelli
 from SALib.analyze import sobol
+try:
+    from numba import njit, prange
+    use_numba = True
+except ImportError:
+    use_numba = False
 
 # Adjust path to find helper modules
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -40,6 +46,7 @@ if src_dir not in sys.path:
     sys.path.insert(0, src_dir)
 
 from helpers.config import settings, get_output_path
+from helpers.utils import index_pickle_folders
 
 # --- CONSTANTS ---
 ANALYSIS_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -47,6 +54,7 @@ ANALYSIS_DIR = os.path.dirname(os.path.abspath(__file__))
 PARAM_MAP_FILE = os.path.join(ANALYSIS_DIR, 'lhs_param_map.csv') 
 VARS_FILE = os.path.join(ANALYSIS_DIR, 'sa_variables.csv')
 RESULTS_FILE = os.path.join(ANALYSIS_DIR, 'gp_sobol_results.xlsx')
+RESULTS_PARQUET_FILE = os.path.join(ANALYSIS_DIR, 'gp_sobol_results.parquet')
 MODEL_SAVE_DIR = os.path.join(ANALYSIS_DIR, 'trained_metamodels')
 
 # Analysis parameters
@@ -57,6 +65,21 @@ SEED_SEQUENCE_LENGTH = 8
 GP_RESTARTS = 10  # Number of optimizer restarts to find global optimum
 SOBOL_N_SAMPLES = 4096  # N for Sobol (Total synthetic runs = N * (2D + 2))
 MIN_Q2_THRESHOLD = 0.5  # Only run Sobol if Q2 (Predictivity) is above this
+# Second-order indices are skipped if S1.sum() + max(ST - S1) exceeds this share
+# of variance (the output is nearly additive, all S2 would be below threshold)
+ADDITIVITY_THRESHOLD = 0.97
+# Isotropic kernel (single length scale): 2-D hyperparameter search, few restarts.
+# If False, an ARD kernel (one length scale per input) is used, initialized at
+# sqrt(D) with tightened bounds so that it also converges within few restarts.
+USE_ISOTROPIC_KERNEL = True
+CV_RESTARTS = 1 if USE_ISOTROPIC_KERNEL else 3  # Optimizer restarts per CV fold
+CV_SPLITS = 5
+CV_RANDOM_STATE = 42
+PREDICT_CHUNK_SIZE = 10000  # Rows of the synthetic sample predicted at once (bounds memory)
+
+# Fitted GPs and CV results are cached on disk, keyed on the hashed inputs
+# (X, y, kernel spec), so re-runs only fit variables whose data changed
+memory = joblib.Memory(os.path.join(MODEL_SAVE_DIR, 'cache'), verbose=0)
 
 # --- OUTPUT VARIABLES (Same as Morris) ---
 SCALAR_OUTPUTS = ['Scenario fulfilment']
@@ -68,6 +91,27 @@ DICT_PROCESSING_METHOD = {
 }
 
 
+def _group_by_subkeys(root_dict):
+    """
+    Groups the dict-valued entries of a nested dictionary by their (ordered) 
+    sub-key schema.
+
+    Entries sharing the same sub-keys can be stacked into one 2D array and
+    processed with a single vectorized NumPy expression. In the usual case all
+    entries share one schema, resulting in a single group.
+
+    Args:
+        root_dict (dict): Dictionary of sub-dictionaries.
+
+    Returns:
+        dict: Maps a tuple of sub-keys to the list of top-level keys using it.
+    """
+    groups = {}
+    for outer_key, inner in root_dict.items():
+        if isinstance(inner, dict):
+            groups.setdefault(tuple(inner.keys()), []).append(outer_key)
+    return groups
+
 def flatten_nested_dict(root_name, data_dict):
     """
     Recursively flattens a 2-level dictionary into a single dictionary 
@@ -87,15 +131,14 @@ def flatten_nested_dict(root_name, data_dict):
     flattened = {}
     if not isinstance(data_dict, dict):
         return flattened
+    numeric = (int, float, np.number)
+    root_prefix = f"Y_{root_name}__"
     for k1, v1 in data_dict.items():
         if isinstance(v1, dict):
-            for k2, v2 in v1.items():
-                if isinstance(v2, (int, float, np.number)):
-                    col_name = f"Y_{root_name}__{k1}__{k2}"
-                    flattened[col_name] = v2
-        elif isinstance(v1, (int, float, np.number)):
-            col_name = f"Y_{root_name}__{k1}"
-            flattened[col_name] = v1
+            prefix = f"{root_prefix}{k1}__"
+            flattened.update({f"{prefix}{k2}": v2 for k2, v2 in v1.items() if isinstance(v2, numeric)})
+        elif isinstance(v1, numeric):
+            flattened[f"{root_prefix}{k1}"] = v1
     return flattened
 
 def convert_counts_to_rates(root_dict, total_agents):
@@ -105,6 +148,8 @@ def convert_counts_to_rates(root_dict, total_agents):
     Logic:
     Calculates the probability of an agent passing from the previous stage 
     to the current stage. Rate = Count / Previous_Stage_Count.
+    Options sharing the same stages are stacked into an array of shape
+    (n_options, n_stages) and converted at once.
 
     Args:
         root_dict (dict): Dictionary where keys are stages and values are agent counts.
@@ -114,22 +159,18 @@ def convert_counts_to_rates(root_dict, total_agents):
         dict: A dictionary of the same structure but with float rates (0.0 to 1.0) 
               instead of absolute integers.
     """
-    converted_dict = {}
-    for option_key, stages in root_dict.items():
-        current_pool = total_agents
-        option_rates = {}
-        if isinstance(stages, dict):
-            for stage_name, survivor_count in stages.items():
-                if current_pool > 0:
-                    rate = survivor_count / current_pool
-                    current_pool = survivor_count
-                else:
-                    rate = 0.0
-                if rate > 1.0: rate = 1.0
-                option_rates[stage_name] = rate
-        else:
-            option_rates = stages
-        converted_dict[option_key] = option_rates
+    converted_dict = dict(root_dict)
+    for stage_names, option_keys in _group_by_subkeys(root_dict).items():
+        if not stage_names:
+            continue
+        counts = np.array([list(root_dict[key].values()) for key in option_keys], dtype=float)
+        prev = np.concatenate([np.full((len(option_keys), 1), float(total_agents)), counts[:, :-1]], axis=1)
+        # Once a pool is exhausted, all subsequent stages have a rate of 0.
+        # np.maximum(prev, 1) avoids the zero division without branching.
+        alive = np.logical_and.accumulate(prev > 0, axis=1)
+        rates = np.where(alive, counts / np.maximum(prev, 1), 0.0).clip(0.0, 1.0)
+        for key, option_rates in zip(option_keys, rates.tolist()):
+            converted_dict[key] = dict(zip(stage_names, option_rates))
     return converted_dict
 
 def calculate_stage_distributions(root_dict):
@@ -140,6 +181,8 @@ def calculate_stage_distributions(root_dict):
     Normalizes the values within a sub-dictionary so they sum to 1.0. 
     Useful for branching logic (e.g., of the 50 agents who reached Stage X, 
     30% took path A, 70% took path B).
+    Stages sharing the same outcomes are stacked into an array of shape
+    (n_stages, n_outcomes) and normalized at once.
 
     Args:
         root_dict (dict): Dictionary containing sub-dictionaries of absolute counts.
@@ -148,24 +191,211 @@ def calculate_stage_distributions(root_dict):
         dict: A dictionary where counts are replaced by their relative share 
               of the total volume in that specific stage.
     """
-    processed_dict = {}
-    for stage_name, outcomes in root_dict.items():
-        stage_rates = {}
-        if isinstance(outcomes, dict):
-            total_stage_events = sum(val for val in outcomes.values() if isinstance(val, (int, float, np.number)))
-            if total_stage_events > 0:
-                for key, count in outcomes.items():
-                    if isinstance(count, (int, float, np.number)):
-                        stage_rates[key] = count / total_stage_events
+    numeric = (int, float, np.number)
+    processed_dict = dict(root_dict)
+    numeric_outcomes = {
+        stage_name: {key: count for key, count in outcomes.items() if isinstance(count, numeric)}
+        for stage_name, outcomes in root_dict.items() if isinstance(outcomes, dict)
+    }
+    for outcome_keys, stage_names in _group_by_subkeys(numeric_outcomes).items():
+        counts = np.array([list(numeric_outcomes[name].values()) for name in stage_names], dtype=float)
+        totals = counts.sum(axis=1, keepdims=True)
+        shares = np.zeros_like(counts)
+        np.divide(counts, totals, out=shares, where=totals > 0)
+        for name, total, stage_rates in zip(stage_names, totals[:, 0], shares.tolist()):
+            if total > 0:
+                processed_dict[name] = dict(zip(outcome_keys, stage_rates))
             else:
-                for key in outcomes.keys():
-                    stage_rates[key] = 0.0
-        else:
-            stage_rates = outcomes
-        processed_dict[stage_name] = stage_rates
+                # If stage was empty, all probabilities are 0
+                processed_dict[name] = dict.fromkeys(root_dict[name], 0.0)
     return processed_dict
 
 
+def load_or_generate_saltelli(problem, n_samples, calc_second_order=True):
+    """
+    Returns the Saltelli sample for `problem`, both raw and scaled to [0, 1].
+
+    The sample is deterministic given the problem spec, `n_samples` and 
+    `calc_second_order`, so it is cached in `ANALYSIS_DIR` under a hash of 
+    these and reloaded on later runs.
+    The scaled matrix is only used for GP prediction and stored as float32.
+
+    Args:
+        problem (dict): SALib problem definition (names, bounds, num_vars).
+        n_samples (int): Base sample size N of the Saltelli scheme.
+        calc_second_order (bool): Whether the sample supports second-order indices
+            (N * (2D + 2) instead of N * (D + 2) rows).
+
+    Returns:
+        tuple:
+            - X_synthetic_raw (np.array): Samples within the parameter bounds.
+            - X_synthetic_scaled (np.array): Samples scaled to [0, 1] (float32).
+    """
+    key = hashlib.md5(json.dumps(problem, sort_keys=True).encode() 
+                      + f"{n_samples}_{calc_second_order}".encode()).hexdigest()
+    raw_cache = os.path.join(ANALYSIS_DIR, f'.saltelli_{key}.npy')
+    scaled_cache = os.path.join(ANALYSIS_DIR, f'.saltelli_{key}_scaled.npy')
+
+    if os.path.exists(raw_cache) and os.path.exists(scaled_cache):
+        print(f"   Loading cached Saltelli sample from {raw_cache}")
+        return np.load(raw_cache), np.load(scaled_cache)
+
+    X_synthetic_raw = saltelli.sample(problem, n_samples, calc_second_order=calc_second_order)
+
+    # Scaling logic (Raw Bounds -> 0..1)
+    bounds = np.array(problem['bounds'])
+    lower_bounds = bounds[:, 0]
+    upper_bounds = bounds[:, 1]
+    X_synthetic_scaled = ((X_synthetic_raw - lower_bounds) / (upper_bounds - lower_bounds)).astype(np.float32)
+
+    np.save(raw_cache, X_synthetic_raw)
+    np.save(scaled_cache, X_synthetic_scaled)
+    return X_synthetic_raw, X_synthetic_scaled
+
+
+if use_numba:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _matern52_dot(X1, X2, inv_length_scale, alpha):
+        """
+        Computes K(X1, X2) @ alpha for the Matern kernel (nu=2.5) in one fused loop.
+
+        Scaled distance, polynomial factor and exponential are evaluated per 
+        pair of points and accumulated directly, so neither the distance nor
+        the kernel matrix is materialized.
+        """
+        n1, n2, n_dims = X1.shape[0], X2.shape[0], X1.shape[1]
+        sqrt5 = np.float32(np.sqrt(5.0))
+        result = np.zeros(n1, dtype=X1.dtype)
+        for i in prange(n1):
+            acc = 0.0
+            for j in range(n2):
+                sq_dist = 0.0
+                for k in range(n_dims):
+                    diff = (X1[i, k] - X2[j, k]) * inv_length_scale[k]
+                    sq_dist += diff * diff
+                K = sqrt5 * np.sqrt(sq_dist)
+                acc += (1.0 + K + K * K / 3.0) * np.exp(-K) * alpha[j]
+            result[i] = acc
+        return result
+
+def matern52_fp32(X1, X2, length_scale):
+    """
+    Evaluates the Matern kernel (nu=2.5) in single precision.
+
+    Uses the closed form (1 + K + K^2/3) * exp(-K) with K = sqrt(5) * d / l,
+    so no Bessel function evaluation is needed. Squared distances are computed
+    via a float32 matrix product (scipy's cdist would upcast to float64).
+
+    Args:
+        X1 (np.array): First set of points, shape (n1, D).
+        X2 (np.array): Second set of points, shape (n2, D).
+        length_scale (float or np.array): Isotropic or per-dimension length scale.
+
+    Returns:
+        np.array: Kernel matrix of shape (n1, n2) in float32.
+    """
+    length_scale = np.asarray(length_scale, dtype=np.float32)
+    X1 = np.asarray(X1, dtype=np.float32) / length_scale
+    X2 = np.asarray(X2, dtype=np.float32) / length_scale
+    sq_dist = (X1 ** 2).sum(axis=1)[:, None] + (X2 ** 2).sum(axis=1)[None, :] - 2.0 * (X1 @ X2.T)
+    np.maximum(sq_dist, 0.0, out=sq_dist)
+    K = np.sqrt(np.float32(5.0) * sq_dist)
+    return (1.0 + K + K ** 2 / 3.0) * np.exp(-K)
+
+def predict_fp32(gp, X):
+    """
+    Predicts the posterior mean of a fitted GP in single precision.
+
+    Training requires float64 for a stable Cholesky decomposition, but the 
+    prediction on the large synthetic Sobol sample is only K(X, X_train) @ alpha.
+    Expects the kernel structure `Constant * Matern(nu=2.5) + White` (the white
+    noise term does not contribute to cross-covariances) and `normalize_y=True`.
+    If numba is installed, the kernel evaluation and the product with alpha 
+    are fused into one parallel loop; otherwise NumPy is used chunk-wise.
+
+    Args:
+        gp (GaussianProcessRegressor): The fitted GP.
+        X (np.array): Points to predict, scaled like the training data.
+
+    Returns:
+        np.array: Predicted means (float64), shape (n,).
+    """
+    constant = np.float32(gp.kernel_.k1.k1.constant_value)
+    length_scale = gp.kernel_.k1.k2.length_scale
+    X_train = gp.X_train_.astype(np.float32)
+    alpha = gp.alpha_.astype(np.float32).ravel()
+
+    if use_numba:
+        inv_length_scale = np.broadcast_to(1.0 / np.asarray(length_scale, dtype=np.float32), (X_train.shape[1],))
+        y_pred = _matern52_dot(np.ascontiguousarray(X, dtype=np.float32), X_train,
+                               np.ascontiguousarray(inv_length_scale), alpha).astype(np.float64)
+        return constant * y_pred * gp._y_train_std + gp._y_train_mean
+
+    y_pred = np.empty(len(X), dtype=np.float64)
+    for start in range(0, len(X), PREDICT_CHUNK_SIZE):
+        X_chunk = X[start:start + PREDICT_CHUNK_SIZE]
+        y_pred[start:start + len(X_chunk)] = constant * (matern52_fp32(X_chunk, X_train, length_scale) @ alpha)
+    return y_pred * gp._y_train_std + gp._y_train_mean
+
+
+@memory.cache
+def fit_gp(X_scaled, y, kernel, n_restarts):
+    """
+    Fits a GP regressor (cached on disk via `joblib.Memory`).
+
+    Args:
+        X_scaled (np.array): Normalized input parameters.
+        y (np.array): Target variable.
+        kernel (Kernel): The (unfitted) kernel, used as the optimizer start point.
+        n_restarts (int): Number of optimizer restarts.
+
+    Returns:
+        GaussianProcessRegressor: The fitted GP.
+    """
+    gp = GaussianProcessRegressor(kernel=kernel, n_restarts_optimizer=n_restarts, normalize_y=True)
+    gp.fit(X_scaled, y)
+    return gp
+
+@memory.cache
+def cross_validate_gp(X_scaled, y, kernel, n_restarts=CV_RESTARTS, n_splits=CV_SPLITS, 
+                      random_state=CV_RANDOM_STATE):
+    """
+    Performs K-Fold Cross-Validation of a GP regressor (cached on disk via `joblib.Memory`).
+
+    Args:
+        X_scaled (np.array): Normalized input parameters.
+        y (np.array): Target variable.
+        kernel (Kernel): The (unfitted) kernel.
+        n_restarts (int): Number of optimizer restarts per fold.
+        n_splits (int): Number of folds.
+        random_state (int): Seed of the fold shuffling.
+
+    Returns:
+        tuple:
+            - y_preds_cv (np.array): Out-of-fold predictions for every sample.
+            - best_theta (np.array): Kernel hyperparameters (log-transformed) of the 
+              fold with the highest log marginal likelihood.
+    """
+    kf = KFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    y_preds_cv = np.zeros_like(y)
+    # Best hyperparameters found across folds (warm start for the final fit)
+    best_theta = None
+    best_ll = -np.inf
+
+    for train_index, test_index in kf.split(X_scaled):
+        X_train, X_test = X_scaled[train_index], X_scaled[test_index]
+        y_train = y[train_index]
+
+        gp_cv = GaussianProcessRegressor(kernel=kernel, n_restarts_optimizer=n_restarts, normalize_y=True)
+        gp_cv.fit(X_train, y_train)
+        y_preds_cv[test_index] = gp_cv.predict(X_test)
+
+        if gp_cv.log_marginal_likelihood_value_ > best_ll:
+            best_ll = gp_cv.log_marginal_likelihood_value_
+            best_theta = gp_cv.kernel_.theta
+    return y_preds_cv, best_theta
+
+
 def load_and_process_data():
     """
     Loads raw model outputs, processes nested structures, and aggregates stochastic seeds.
@@ -176,7 +406,7 @@ def load_and_process_data():
     3. Extracts scalar outputs and processes dictionary outputs (using 
        `flatten_nested_dict` and conversion helpers).
     4. Aggregates stochastic replications: Groups by `Run_id` (unique parameter set)
-       and calculates the Mean and Standard Deviation of the 5 random seeds.
+       and calculates the Mean of the 5 random seeds (in float32).
 
     Returns:
         tuple: 
@@ -201,6 +431,7 @@ def load_and_process_data():
     raw_data_list = []
     
     print(f"Processing {len(param_map_df)} map rows...")
+    folder_index = index_pickle_folders(param_map_df['Run_id'].astype(int).unique().tolist(), FILES_PREFIX)
 
     for index, row in param_map_df.iterrows():
         run_id = int(row['Run_id'])
@@ -212,15 +443,13 @@ def load_and_process_data():
         row_data['Replication_Seed'] = seed
 
         try:
-            pickle_folder = get_output_path(runid=run_id, subfolder='pickles')
             seed_sequence = str(seed) * SEED_SEQUENCE_LENGTH
-            search_pattern = os.path.join(pickle_folder, f"model_df_{FILES_PREFIX}_*_{seed_sequence}.pkl")
-            files_found = glob.glob(search_pattern)
+            pickle_file = (folder_index[run_id].get(seed_sequence) or [None])[0]
 
-            if not files_found:
+            if pickle_file is None:
                 continue # Skip missing
             
-            output_df = pd.read_pickle(files_found[0])
+            output_df = pd.read_pickle(pickle_file)
             if output_df.empty:
                 continue
 
@@ -258,6 +487,10 @@ def load_and_process_data():
 
     # Convert to DF
     full_df = pd.DataFrame(raw_data_list)
+    # Single precision halves the memory traffic of the aggregation
+    y_cols = [c for c in full_df.columns if c.startswith('Y_')]
+    full_df[y_cols] = full_df[y_cols].astype(np.float32)
+    full_df['Run_id'] = full_df['Run_id'].astype(np.int32)
     
     # --- AGGREGATION STEP ---
     # We group by 'Run_id' (which represents one unique parameter set)
@@ -267,17 +500,17 @@ def load_and_process_data():
     # Columns to group by (all parameter columns + Run_id)
     group_cols = ['Run_id'] + param_names
     
-    # Calculate Mean and Std
+    # Calculate Mean
     df_grouped = full_df.groupby(group_cols)
     df_mean = df_grouped.mean().reset_index()
-    df_std = df_grouped.std().reset_index() # Good to check noise levels later
     
     # Extract X (Parameters) and Y (Outputs)
     # Ensure X is sorted by Run_id to match Y
     df_mean = df_mean.sort_values('Run_id')
     
     X = df_mean[param_names].values
-    Y_df = df_mean.drop(columns=group_cols + ['Replication_Seed'], errors='ignore')
+    # GP training requires double precision again
+    Y_df = df_mean.drop(columns=group_cols + ['Replication_Seed'], errors='ignore').astype(np.float64)
     
     print(f"Final Training Set: {len(X)} unique samples.")
     return X, Y_df, param_names, sa_vars_df
@@ -288,8 +521,8 @@ def run_gp_and_sobol():
 
     Workflow:
     1. Data Prep: Loads data and normalizes inputs (X) to [0, 1] using MinMaxScaler.
-    2. Sampling: Generates a massive synthetic dataset using Saltelli sampling 
-       (enabled for Second-Order indices).
+    2. Sampling: Generates a synthetic dataset using Saltelli sampling (first-order
+       only; the larger Second-Order sample is only generated when needed).
     3. Loop: Iterates through every output variable in `Y_df`.
     4. Metamodeling:
        - Configures a robust Gaussian Process (Constant * Matern + WhiteKernel).
@@ -298,7 +531,9 @@ def run_gp_and_sobol():
        - Fits the final GP on all data.
     5. Sensitivity Analysis (Sobol):
        - Uses the trained GP to predict outcomes for the synthetic dataset.
-       - Calculates Sobol Indices (S1, ST, and S2).
+       - Calculates Sobol Indices (S1, ST).
+       - If the output is not nearly additive, repeats this on the Second-Order
+         sample to calculate S2.
     6. Filtering & Saving:
        - Filters Pairwise Interactions (S2) using a "Smart Threshold" (>1% variance).
        - Saves Main Effects and Significant Interactions to `gp_sobol_results.xlsx`.
@@ -325,20 +560,19 @@ def run_gp_and_sobol():
         'bounds': sa_vars_df[['min', 'max']].values.tolist()
     }
     
-    # --- Generate Synthetic Inputs with Second Order ---
-    print(f"\nGenerating synthetic inputs for Sobol analysis (2nd Order Enabled)...")
-    
-    X_synthetic_raw = saltelli.sample(problem, SOBOL_N_SAMPLES, calc_second_order=True)
+    # --- Generate Synthetic Inputs (First Order, Second Order on demand) ---
+    print(f"\nGenerating synthetic inputs for Sobol analysis...")
     
-    # Scaling logic (Raw Bounds -> 0..1)
-    bounds = np.array(problem['bounds'])
-    lower_bounds = bounds[:, 0]
-    upper_bounds = bounds[:, 1]
-    X_synthetic_scaled = (X_synthetic_raw - lower_bounds) / (upper_bounds - lower_bounds)
+    _, X_first_order_scaled = load_or_generate_saltelli(problem, SOBOL_N_SAMPLES, calc_second_order=False)
+    X_synthetic_scaled = None
 
     if not os.path.exists(MODEL_SAVE_DIR):
         os.makedirs(MODEL_SAVE_DIR)
 
+    # Upper triangle (j > i) of the S2 matrix, shared by all outputs
+    names_arr = np.array(param_names)
+    iu, ju = np.triu_indices(len(param_names), k=1)
+
     # --- LOOP OVER OUTPUTS ---
     output_cols = [c for c in Y_df.columns if c.startswith('Y_')]
     print(f"\n--- Starting Metamodeling Loop for {len(output_cols)} variables ---")
@@ -357,27 +591,18 @@ def run_gp_and_sobol():
             continue
 
         # --- Robust Kernel Setup ---
-        k_matern = Matern(length_scale=np.ones(X.shape[1]), 
-                          length_scale_bounds=(1e-2, 1e2), nu=2.5)
+        if USE_ISOTROPIC_KERNEL:
+            k_matern = Matern(length_scale=1.0, length_scale_bounds=(1e-2, 1e2), nu=2.5)
+        else:
+            k_matern = Matern(length_scale=np.sqrt(X.shape[1]) * np.ones(X.shape[1]), 
+                              length_scale_bounds=(0.1, 10), nu=2.5)
         k_constant = ConstantKernel(constant_value=1.0, constant_value_bounds=(1e-3, 1e3))
         k_white = WhiteKernel(noise_level=1.0, noise_level_bounds=(1e-5, 1e1)) #Option: 1e2
         
         kernel = k_constant * k_matern + k_white
-        
-        #n_restarts_optimizer=50
-        gp = GaussianProcessRegressor(kernel=kernel, n_restarts_optimizer=15, normalize_y=True)
 
         # Cross-Validation
-        kf = KFold(n_splits=5, shuffle=True, random_state=42)
-        y_preds_cv = np.zeros_like(y)
-        
-        for train_index, test_index in kf.split(X_scaled):
-            X_train, X_test = X_scaled[train_index], X_scaled[test_index]
-            y_train, y_test = y[train_index], y[test_index]
-            
-            gp_cv = GaussianProcessRegressor(kernel=kernel, n_restarts_optimizer=5, normalize_y=True)
-            gp_cv.fit(X_train, y_train)
-            y_preds_cv[test_index], _ = gp_cv.predict(X_test, return_std=True)
+        y_preds_cv, best_theta = cross_validate_gp(X_scaled, y, kernel)
 
         q2 = r2_score(y, y_preds_cv)
         rmse = np.sqrt(np.mean((y - y_preds_cv)**2))
@@ -394,55 +619,66 @@ def run_gp_and_sobol():
             print("   [!] Q2 too low. Model failed to capture trend.")
             continue
 
-        # Train Final Model
-        gp.fit(X_scaled, y)
+        # Train Final Model, starting the optimizer from the best CV hyperparameters
+        # (few restarts needed instead of searching again from the prior)
+        gp = fit_gp(X_scaled, y, kernel.clone_with_theta(best_theta), n_restarts=2)
         clean_name = target_col.replace("Y_", "").replace(" ", "_")[:50]
         joblib.dump(gp, os.path.join(MODEL_SAVE_DIR, f"gp_{clean_name}.pkl"))
 
         # --- Run Sobol on Emulator ---
         print("   Running Sobol prediction on emulator...")
-        y_synthetic_pred = gp.predict(X_synthetic_scaled, return_std=False)
-        
-        # ENABLE interactions here
-        Si = sobol.analyze(problem, y_synthetic_pred, print_to_console=False, calc_second_order=True)
+        y_synthetic_pred = predict_fp32(gp, X_first_order_scaled)
+        Si = sobol.analyze(problem, y_synthetic_pred, print_to_console=False, calc_second_order=False)
+
+        explained = Si['S1'].sum() + np.clip(Si['ST'] - Si['S1'], 0.0, None).max()
+        calc_interactions = explained <= ADDITIVITY_THRESHOLD
+        if calc_interactions:
+            # ENABLE interactions here
+            print("   Not additive, running 2nd Order Sobol prediction on emulator...")
+            if X_synthetic_scaled is None:
+                _, X_synthetic_scaled = load_or_generate_saltelli(problem, SOBOL_N_SAMPLES)
+            y_synthetic_pred = predict_fp32(gp, X_synthetic_scaled)
+            Si = sobol.analyze(problem, y_synthetic_pred, print_to_console=False, calc_second_order=True)
+        else:
+            print(f"   S1 + interactions explain {explained:.1%} of variance, skipping 2nd Order.")
         
         # --- Store Results ---
         
         # 1. Main Effects
-        for i, name in enumerate(problem['names']):
-            sobol_results_list.append({
-                'Type': 'Main_Effect',
-                'Output_Variable': target_col,
-                'Parameter_1': name,
-                'Parameter_2': '-',
-                'Score': Si['S1'][i],
-                'Total_Score': Si['ST'][i],
-                'Conf': Si['ST_conf'][i],
-                'Model_Q2': q2
-            })
+        sobol_results_list.append(pd.DataFrame({
+            'Type': 'Main_Effect',
+            'Output_Variable': target_col,
+            'Parameter_1': problem['names'],
+            'Parameter_2': '-',
+            'Score': Si['S1'],
+            'Total_Score': Si['ST'],
+            'Conf': Si['ST_conf'],
+            'Model_Q2': q2
+        }))
             
         # 2. Interactions (Filtered by Threshold)
-        # S2 is a square matrix. We iterate the upper triangle (j > i)
-        for i in range(len(param_names)):
-            for j in range(i + 1, len(param_names)):
-                s2_val = Si['S2'][i][j]
-                
-                if s2_val > INTERACTION_THRESHOLD:
-                    sobol_results_list.append({
-                        'Type': 'Interaction',
-                        'Output_Variable': target_col,
-                        'Parameter_1': param_names[i],
-                        'Parameter_2': param_names[j],
-                        'Score': s2_val,
-                        'Total_Score': '-', # Not applicable for pairs
-                        'Conf': Si['S2_conf'][i][j],
-                        'Model_Q2': q2
-                    })
+        if not calc_interactions:
+            continue
+        # S2 is a square matrix. We select from the upper triangle (j > i)
+        S2 = np.asarray(Si['S2'])
+        S2_conf = np.asarray(Si['S2_conf'])
+        mask = S2[iu, ju] > INTERACTION_THRESHOLD
+        sel_i, sel_j = iu[mask], ju[mask]
+        sobol_results_list.append(pd.DataFrame({
+            'Type': 'Interaction',
+            'Output_Variable': target_col,
+            'Parameter_1': names_arr[sel_i],
+            'Parameter_2': names_arr[sel_j],
+            'Score': S2[sel_i, sel_j],
+            'Total_Score': '-', # Not applicable for pairs
+            'Conf': S2_conf[sel_i, sel_j],
+            'Model_Q2': q2
+        }))
 
     # --- SAVE TO EXCEL ---
     print(f"\n--- Saving Results ---")
     if sobol_results_list:
-        df_sobol = pd.DataFrame(sobol_results_list)
+        df_sobol = pd.concat(sobol_results_list, ignore_index=True)
         df_valid = pd.DataFrame(validation_results_list)
         
         # Reorder columns for readability
@@ -451,11 +687,14 @@ def run_gp_and_sobol():
         existing_cols = [c for c in cols if c in df_sobol.columns]
         df_sobol = df_sobol[existing_cols]
 
-        with pd.ExcelWriter(RESULTS_FILE) as writer:
+        with pd.ExcelWriter(RESULTS_FILE, engine='xlsxwriter') as writer:
             df_sobol.to_excel(writer, sheet_name='Sobol_Indices', index=False)
             df_valid.to_excel(writer, sheet_name='Validation_Scores', index=False)
             
-        print(f"Saved results to {RESULTS_FILE}")
+        # Parquet copy for programmatic downstream analysis ('-' placeholders become NaN)
+        df_sobol.assign(Total_Score=pd.to_numeric(df_sobol['Total_Score'], errors='coerce')).to_parquet(
+            RESULTS_PARQUET_FILE, index=False)
+        print(f"Saved results to {RESULTS_FILE} and {RESULTS_PARQUET_FILE}")
     else:
         print("No results generated.")
 
@@ -7,8 +7,8 @@ It performs the following steps:
 
 1.  Loads a `morris_param_map.csv` and `sa_variables.csv`.
 2.  Defines `SCALAR_OUTPUTS` and `DICT_OUTPUTS` to analyze.
-3.  Iterates through every row in the parameter map:
-    a. Reads the pickle file.
+3.  Iterates through every row in the parameter map (in a process pool):
+    a. Reads the pickle file (located via a one-off scan of each pickle folder).
     b. Extracts scalar variables directly.
     c. Checks `DICT_PROCESSING_METHOD` for each dict variable:
        - 'survivorship': Calculates conditional pass rates (sequential).
@@ -16,8 +16,9 @@ It performs the following steps:
        - 'raw': Uses the absolute numbers.
     d. Flattens the resulting dictionary.
 4.  Merges the extracted outputs back into the parameter map.
-5.  Performs Morris analysis for each variable.
-6.  Saves results to `morris_results_combined.xlsx`.
+5.  Performs Morris analysis for each variable (seeds/sub-metrics in parallel).
+6.  Saves results to `morris_results_combined.xlsx` (and one Parquet file per sheet
+    to `morris_results_parquet`).
 
 :Authors:
  - Ivan Digel <ivan.digel@uni-kassel.de>
@@ -28,7 +29,7 @@ import sys
 import os
 import pandas as pd
 import numpy as np
-import glob
+from concurrent.futures import ProcessPoolExecutor
 from SALib.analyze import morris
 
 # Adjust path to find helper modules
@@ -38,6 +39,7 @@ if src_dir not in sys.path:
     sys.path.insert(0, src_dir)
 
 from helpers.config import settings, get_output_path
+from helpers.utils import index_pickle_folders
 
 # --- Define Constants ---
 
@@ -46,6 +48,7 @@ ANALYSIS_DIR = os.path.dirname(os.path.abspath(__file__))
 PARAM_MAP_FILE = os.path.join(ANALYSIS_DIR, 'morris_param_map.csv') 
 VARS_FILE = os.path.join(ANALYSIS_DIR, 'sa_variables.csv')
 COMBINED_RESULTS_FILE = os.path.join(ANALYSIS_DIR, 'morris_results_combined.xlsx')
+PARQUET_RESULTS_DIR = os.path.join(ANALYSIS_DIR, 'morris_results_parquet')
 MISSING_LOG_FILE = os.path.join(ANALYSIS_DIR, 'missing_runs_report.csv') # <--- NEW LOG FILE
 
 # Analysis parameters
@@ -85,17 +88,16 @@ def flatten_nested_dict(root_name, data_dict):
     if not isinstance(data_dict, dict):
         return flattened
 
+    numeric = (int, float, np.number)
+    root_prefix = f"Y_{root_name}__"
     for k1, v1 in data_dict.items():
         # Level 1
         if isinstance(v1, dict):
-            # Level 2
-            for k2, v2 in v1.items():
-                if isinstance(v2, (int, float, np.number)):
-                    col_name = f"Y_{root_name}__{k1}__{k2}"
-                    flattened[col_name] = v2
-        elif isinstance(v1, (int, float, np.number)):
-            col_name = f"Y_{root_name}__{k1}"
-            flattened[col_name] = v1
+            # Level 2 (prefix formatted once per level-1 key)
+            prefix = f"{root_prefix}{k1}__"
+            flattened.update({prefix + str(k2): v2 for k2, v2 in v1.items() if isinstance(v2, numeric)})
+        elif isinstance(v1, numeric):
+            flattened[root_prefix + str(k1)] = v1
             
     return flattened
 
@@ -108,21 +110,16 @@ def convert_counts_to_rates(root_dict, total_agents):
     converted_dict = {}
     
     for option_key, stages in root_dict.items():
-        current_pool = total_agents
-        option_rates = {}
-        
         if isinstance(stages, dict):
-            # Iterate through sequential stages
-            for stage_name, survivor_count in stages.items():
-                if current_pool > 0:
-                    rate = survivor_count / current_pool
-                    if rate > 1.0: rate = 1.0
-                    current_pool = survivor_count
-                else:
-                    rate = 0.0
-                    current_pool = 0
-                
-                option_rates[stage_name] = rate
+            # All sequential stages at once: each count divided by the previous one
+            counts = np.fromiter(stages.values(), dtype=np.float64, count=len(stages))
+            prev = np.empty_like(counts)
+            prev[:1] = total_agents
+            prev[1:] = counts[:-1]
+            # Once the pool is exhausted, all subsequent rates are 0
+            alive = np.logical_and.accumulate(prev > 0)
+            rates = np.where(alive, np.minimum(counts / np.maximum(prev, 1), 1.0), 0.0)
+            option_rates = dict(zip(stages.keys(), rates.tolist()))
         else:
             option_rates = stages
 
@@ -142,18 +139,18 @@ def calculate_stage_distributions(root_dict):
         stage_rates = {}
         
         if isinstance(outcomes, dict):
-            # 1. Calculate the total volume for THIS specific stage
-            total_stage_events = sum(val for val in outcomes.values() if isinstance(val, (int, float, np.number)))
+            # 1. Extract numeric outcomes once as parallel keys/values
+            keys = [key for key, val in outcomes.items() if isinstance(val, (int, float, np.number))]
+            counts = np.asarray([outcomes[key] for key in keys], dtype=np.float64)
+            # 2. Calculate the total volume for THIS specific stage
+            total_stage_events = counts.sum()
             
             if total_stage_events > 0:
-                for key, count in outcomes.items():
-                    if isinstance(count, (int, float, np.number)):
-                        # Calculate share (0.0 to 1.0)
-                        stage_rates[key] = count / total_stage_events
+                # Calculate shares (0.0 to 1.0)
+                stage_rates = dict(zip(keys, (counts / total_stage_events).tolist()))
             else:
                 # If stage was empty, all probabilities are 0
-                for key in outcomes.keys():
-                    stage_rates[key] = 0.0
+                stage_rates = dict.fromkeys(outcomes, 0.0)
         else:
             # Fallback for non-dict structures
             stage_rates = outcomes
@@ -163,6 +160,113 @@ def calculate_stage_distributions(root_dict):
     return processed_dict
 
 
+def _extract_run(run_id, seed, pickle_file):
+    """
+    Loads the model output pickle of one run and extracts the output variables.
+
+    Top-level function so that it can be mapped over all runs by a process pool.
+
+    Args:
+        run_id (int): Run ID of the parameter set.
+        seed (int): Replication seed of the run.
+        pickle_file (str): Path of the model output pickle, or None if not found.
+
+    Returns:
+        tuple: (row_outputs, missing_entry) - the extracted outputs of the run, or
+            None and a dict describing why the run is missing or invalid.
+    """
+    row_outputs = {'Run_id': run_id, 'Replication_Seed': seed}
+    
+    try:
+        # --- CHECK 1: File Existence ---
+        if pickle_file is None:
+            pickle_folder = get_output_path(runid=run_id, subfolder='pickles', createfolder=False)
+            seed_sequence = str(seed) * SEED_SEQUENCE_LENGTH
+            return None, {
+                'Run_id': run_id, 
+                'Seed': seed, 
+                'Error': 'File Not Found',
+                'Pattern': os.path.join(pickle_folder, f"model_df_{FILES_PREFIX}_*_{seed_sequence}.pkl")
+            }
+        
+        # --- CHECK 2: Empty DataFrame ---
+        output_df = pd.read_pickle(pickle_file)
+        if output_df.empty:
+            return None, {
+                'Run_id': run_id, 
+                'Seed': seed, 
+                'Error': 'Empty DataFrame',
+                'File': pickle_file
+            }
+            
+        # Plain dict: O(1) lookups instead of Series indexing per variable
+        last_row = output_df.iloc[-1].to_dict()
+        
+        # 1. Extract Scalars
+        for var_name in SCALAR_OUTPUTS:
+            if var_name in last_row:
+                row_outputs[f"Y_{var_name}"] = last_row[var_name]
+        
+        # 2. Extract Dictionaries (With Transformation)
+        for var_name in DICT_OUTPUTS:
+            if var_name in last_row:
+                raw_data = last_row[var_name]
+                method = DICT_PROCESSING_METHOD.get(var_name, 'raw')
+                
+                if method == 'survivorship':
+                    data_to_flatten = convert_counts_to_rates(raw_data, INITIAL_AGENT_COUNT)
+                elif method == 'distribution':
+                    data_to_flatten = calculate_stage_distributions(raw_data)
+                else:
+                    data_to_flatten = raw_data
+                
+                flat_data = flatten_nested_dict(var_name, data_to_flatten)
+                row_outputs.update(flat_data)
+        
+        # Convert here, so that a non-numeric value marks only this run as invalid
+        for key, value in row_outputs.items():
+            if key not in ('Run_id', 'Replication_Seed'):
+                row_outputs[key] = float(value)
+        
+        return row_outputs, None
+
+    except Exception as e:
+        print(f"  [ERROR] Run {run_id}: {e}")
+        return None, {
+            'Run_id': run_id, 
+            'Seed': seed, 
+            'Error': f"Exception: {str(e)}",
+            'File': 'Unknown'
+        }
+
+
+_worker_problem = None
+
+def _init_morris_worker(problem):
+    """
+    Process pool initializer: stores the SALib problem in the worker process.
+
+    Args:
+        problem (dict): SALib problem definition.
+    """
+    global _worker_problem
+    _worker_problem = problem
+
+def _run_morris(X, Y):
+    """
+    Runs the Morris analysis for one (sub-metric, seed) pair in a worker process.
+
+    Args:
+        X (np.array): Parameter matrix of the seed's runs.
+        Y (np.array): Output values of the sub-metric for these runs.
+
+    Returns:
+        tuple: (mu_star, sigma) arrays, one value per parameter.
+    """
+    Si = morris.analyze(_worker_problem, X, Y, print_to_console=False)
+    return Si['mu_star'], Si['sigma']
+
+
 def analyze_morris_results():
     """
     Main function to load data, gather outputs, and run Morris analysis.
@@ -192,90 +296,54 @@ def analyze_morris_results():
         print(f"Error building SALib problem: {e}")
         return
 
+    # Outputs are matched to the parameter map by row position
+    if param_map_df.duplicated(['Run_id', 'Replication_Seed']).any():
+        print(f"Error: (Run_id, Replication_Seed) is not unique in the parameter map.")
+        return
+
     # --- Gather Model Outputs ---
     print(f"\n--- 3. Gathering Model Outputs ---")
     print(f"Scalars: {SCALAR_OUTPUTS}")
     print(f"Dicts:   {DICT_OUTPUTS}")
     
-    extracted_y_data = [] 
-    
     files_processed = 0
     seeds_with_missing_files = set()
     
     missing_runs_log = []
 
-    for index, row in param_map_df.iterrows():
-        run_id = int(row['Run_id'])
-        seed = int(row['Replication_Seed'])
-        
-        row_outputs = {'Run_id': run_id, 'Replication_Seed': seed}
-        
-        try:
-            pickle_folder = get_output_path(runid=run_id, subfolder='pickles')
-            seed_sequence = str(seed) * SEED_SEQUENCE_LENGTH
-            search_pattern = os.path.join(pickle_folder, f"model_df_{FILES_PREFIX}_*_{seed_sequence}.pkl")
-            files_found = glob.glob(search_pattern)
-            
-            # --- CHECK 1: File Existence ---
-            if not files_found:
-                seeds_with_missing_files.add(seed)
-                missing_runs_log.append({
-                    'Run_id': run_id, 
-                    'Seed': seed, 
-                    'Error': 'File Not Found',
-                    'Pattern': search_pattern
-                })
-                # Print a small dot or 'X' to indicate progress/failure without spamming
-                # print("x", end="", flush=True) 
+    # Plain Python ints per row: no Series/NumPy scalar boxing, cheap to pickle
+    run_ids = param_map_df['Run_id'].astype(int).tolist()
+    seeds = param_map_df['Replication_Seed'].astype(int).tolist()
+    # Scan every pickle folder once instead of globbing per run
+    folder_index = index_pickle_folders(set(run_ids), FILES_PREFIX)
+    pickle_files = [(folder_index[run_id].get(str(seed) * SEED_SEQUENCE_LENGTH) or [None])[0]
+                    for run_id, seed in zip(run_ids, seeds)]
+
+    # Outputs are written straight into a preallocated (runs x outputs) float32
+    # array (rates or small counts: single precision is ample). Its columns are
+    # known after the first successful run and only grow if a later run has new keys.
+    y_out = None
+    col_idx_by_name = {}
+
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = executor.map(_extract_run, run_ids, seeds, pickle_files, chunksize=32)
+        for run_idx, (row_outputs, missing_entry) in enumerate(results):
+            if missing_entry is not None:
+                seeds_with_missing_files.add(missing_entry['Seed'])
+                missing_runs_log.append(missing_entry)
                 continue
-            
-            # --- CHECK 2: Empty DataFrame ---
-            output_df = pd.read_pickle(files_found[0])
-            if output_df.empty:
-                seeds_with_missing_files.add(seed)
-                missing_runs_log.append({
-                    'Run_id': run_id, 
-                    'Seed': seed, 
-                    'Error': 'Empty DataFrame',
-                    'File': files_found[0]
-                })
-                continue
-                
-            files_processed += 1
-            last_row = output_df.iloc[-1]
-            
-            # 1. Extract Scalars
-            for var_name in SCALAR_OUTPUTS:
-                if var_name in last_row:
-                    row_outputs[f"Y_{var_name}"] = last_row[var_name]
-            
-            # 2. Extract Dictionaries (With Transformation)
-            for var_name in DICT_OUTPUTS:
-                if var_name in last_row:
-                    raw_data = last_row[var_name]
-                    method = DICT_PROCESSING_METHOD.get(var_name, 'raw')
-                    
-                    if method == 'survivorship':
-                        data_to_flatten = convert_counts_to_rates(raw_data, INITIAL_AGENT_COUNT)
-                    elif method == 'distribution':
-                        data_to_flatten = calculate_stage_distributions(raw_data)
-                    else:
-                        data_to_flatten = raw_data
-                    
-                    flat_data = flatten_nested_dict(var_name, data_to_flatten)
-                    row_outputs.update(flat_data)
-            
-            extracted_y_data.append(row_outputs)
 
-        except Exception as e:
-            print(f"  [ERROR] Run {run_id}: {e}")
-            seeds_with_missing_files.add(seed)
-            missing_runs_log.append({
-                'Run_id': run_id, 
-                'Seed': seed, 
-                'Error': f"Exception: {str(e)}",
-                'File': 'Unknown'
-            })
+            files_processed += 1
+            del row_outputs['Run_id'], row_outputs['Replication_Seed']
+            for key in row_outputs:
+                if key not in col_idx_by_name:
+                    col_idx_by_name[key] = len(col_idx_by_name)
+            if y_out is None or y_out.shape[1] < len(col_idx_by_name):
+                y_new = np.full((len(run_ids), len(col_idx_by_name)), np.nan, dtype=np.float32)
+                if y_out is not None:
+                    y_new[:, :y_out.shape[1]] = y_out
+                y_out = y_new
+            y_out[run_idx, [col_idx_by_name[key] for key in row_outputs]] = list(row_outputs.values())
 
     print(f"\nGathering complete. Processed {files_processed} files.")
     
@@ -294,116 +362,131 @@ def analyze_morris_results():
     else:
         print("-> All files found successfully.")
 
-    if not extracted_y_data:
+    if y_out is None:
         print("No output data extracted. Exiting.")
         return
 
-    # Create DataFrame
-    y_df = pd.DataFrame(extracted_y_data)
-    full_df = pd.merge(param_map_df, y_df, on=['Run_id', 'Replication_Seed'], how='left')
+    # Create DataFrame: rows are aligned with the parameter map (missing runs are NaN)
+    y_df = pd.DataFrame(y_out, columns=list(col_idx_by_name), copy=False)
+    full_df = pd.concat([param_map_df.reset_index(drop=True), y_df], axis=1)
 
     # --- 4. Main Analysis Loop ---
     sheets_to_save = {}
     ALL_VARS_TO_ANALYZE = SCALAR_OUTPUTS + DICT_OUTPUTS
+    # Seeds with missing runs are excluded up front with one vectorized mask
+    missing_seeds = np.fromiter(seeds_with_missing_files, dtype=full_df['Replication_Seed'].dtype,
+                                count=len(seeds_with_missing_files))
+    full_df = full_df[~full_df['Replication_Seed'].isin(missing_seeds)]
+    # Split the runs by replication seed once (hashing the key a single time)
+    # instead of scanning full_df for every (sub-metric, seed) pair
+    seed_groups = full_df.groupby('Replication_Seed', sort=True)
+    # The parameter matrix only depends on the seed, not on the sub-metric.
+    # Resolve the parameter columns once and slice rows by the groups' positions.
+    param_col_idx = np.array([full_df.columns.get_loc(name) for name in problem['names']], dtype=np.intp)
+    X_full = np.ascontiguousarray(full_df.iloc[:, param_col_idx].to_numpy(dtype=np.float64))
+    # Sorted seeds and their row positions, computed once
+    seed_rows = dict(sorted(seed_groups.indices.items()))
+    X_cache = {seed: X_full[rows] for seed, rows in seed_rows.items()}
+    num_vars = problem['num_vars']
+    param_names_arr = np.array(problem['names'], dtype=object)
     
-    for root_var in ALL_VARS_TO_ANALYZE:
-        print(f"\n--- Analyzing Root Variable: {root_var} ---")
+    # Sub-metric columns of every root variable, found in a single pass over the columns
+    col_index = {root_var: [] for root_var in ALL_VARS_TO_ANALYZE}
+    col_patterns = [(root_var, f"Y_{root_var}", f"Y_{root_var}__") for root_var in ALL_VARS_TO_ANALYZE]
+    for col in full_df.columns:
+        for root_var, exact_col, prefix_col in col_patterns:
+            if col == exact_col or col.startswith(prefix_col):
+                col_index[root_var].append(col)
+                break
+
+    # Workers receive the SALib problem once via the initializer, not per task
+    with ProcessPoolExecutor(max_workers=os.cpu_count(),
+                             initializer=_init_morris_worker, initargs=(problem,)) as executor:
+        for root_var in ALL_VARS_TO_ANALYZE:
+            print(f"\n--- Analyzing Root Variable: {root_var} ---")
         
-        target_cols = []
-        exact_col = f"Y_{root_var}"
-        prefix_col = f"Y_{root_var}__"
-        
-        for col in full_df.columns:
-            if col == exact_col:
-                target_cols.append(col)
-            elif col.startswith(prefix_col):
-                target_cols.append(col)
+            target_cols = col_index[root_var]
+            exact_col = f"Y_{root_var}"
+            prefix_col = f"Y_{root_var}__"
                 
-        if not target_cols:
-            print(f"No data columns found for '{root_var}'. Skipping.")
-            continue
+            if not target_cols:
+                print(f"No data columns found for '{root_var}'. Skipping.")
+                continue
             
-        print(f"Found {len(target_cols)} sub-metrics for '{root_var}'.")
+            print(f"Found {len(target_cols)} sub-metrics for '{root_var}'.")
 
-        root_individual_results = []
-        root_aggregated_rows = []
+            # Individual results as parallel lists of arrays, assembled once per root variable
+            indiv_columns = {'Sub_Metric': [], 'Replication_Seed': [], 'Parameter': [], 'mu_star': [], 'sigma': []}
+            # Aggregated results columnwise (one list per column, in output order)
+            agg_columns = {col: [] for col in ['Sub_Metric', 'Parameter', 'mu_star_Mean', 'mu_star_Std',
+                                               'sigma_Mean', 'sigma_Std']}
         
-        for col_name in target_cols:
-            if col_name == exact_col:
-                sub_metric_name = "Total"
-            else:
-                sub_metric_name = col_name.replace(prefix_col, "")
+            # -- Collect (sub-metric, seed) tasks --
+            tasks = []
+            for col_name in target_cols:
+                # Plain arrays of the column, sliced per seed (no per-seed DataFrame copies)
+                y_col = full_df[col_name].to_numpy()
+                valid_col = full_df[col_name].notna().to_numpy()
+                if not valid_col.any():
+                    continue
 
-            missing_count = full_df[col_name].isna().sum()
-            if missing_count == len(full_df):
-                continue
+                for seed, rows in seed_rows.items():
+                    valid = valid_col[rows]
+                    if not valid.any(): continue
+                
+                    Y = y_col[rows][valid]
+                    X = X_cache[seed][valid]
+                    tasks.append((col_name, seed, X, Y))
+
+            # -- Analysis Per Replication (independent, run in the process pool) --
+            task_results = executor.map(_run_morris, [t[2] for t in tasks], [t[3] for t in tasks])
+            results_by_col = {}
+            for (col_name, seed, _, _), (mu_star, sigma) in zip(tasks, task_results):
+                results_by_col.setdefault(col_name, []).append((seed, mu_star, sigma))
+
+            for col_name, col_results in results_by_col.items():
+                if col_name == exact_col:
+                    sub_metric_name = "Total"
+                else:
+                    sub_metric_name = col_name.replace(prefix_col, "")
 
-            # -- Analysis Per Replication --
-            all_mu_star = []
-            all_sigma = []
-            
-            unique_seeds = sorted(full_df['Replication_Seed'].unique())
+                # One contiguous (n_seeds, n_params) block per index, filled in place
+                mu_arr = np.empty((len(col_results), num_vars), dtype=np.float64)
+                sigma_arr = np.empty_like(mu_arr)
             
-            for seed in unique_seeds:
-                if seed in seeds_with_missing_files: 
-                    continue
-                
-                rep_data = full_df[full_df['Replication_Seed'] == seed].copy()
-                rep_data.dropna(subset=[col_name], inplace=True)
+                for i, (seed, mu_star, sigma) in enumerate(col_results):
+                    mu_arr[i] = mu_star
+                    sigma_arr[i] = sigma
                 
-                if rep_data.empty: continue
-                
-                Y = rep_data[col_name].values
-                X = rep_data[problem['names']].values
-                
-                if len(Y) != len(X): continue
-                
-                Si = morris.analyze(problem, X, Y, print_to_console=False)
-                
-                all_mu_star.append(Si['mu_star'])
-                all_sigma.append(Si['sigma'])
-                
-                df_indiv = pd.DataFrame({
-                    'Sub_Metric': sub_metric_name,
-                    'Replication_Seed': seed,
-                    'Parameter': problem['names'],
-                    'mu_star': Si['mu_star'],
-                    'sigma': Si['sigma']
-                })
-                root_individual_results.append(df_indiv)
-
-            # -- Aggregation --
-            if all_mu_star:
-                mu_star_mean = np.mean(all_mu_star, axis=0)
-                mu_star_std = np.std(all_mu_star, axis=0)
-                sigma_mean = np.mean(all_sigma, axis=0)
-                sigma_std = np.std(all_sigma, axis=0)
-                
-                for i, param_name in enumerate(problem['names']):
-                    root_aggregated_rows.append({
-                        'Sub_Metric': sub_metric_name,
-                        'Parameter': param_name,
-                        'mu_star_Mean': mu_star_mean[i],
-                        'mu_star_Std': mu_star_std[i],
-                        'sigma_Mean': sigma_mean[i],
-                        'sigma_Std': sigma_std[i]
-                    })
-
-        # -- Compile Tables --
-        if root_aggregated_rows:
-            agg_df = pd.DataFrame(root_aggregated_rows)
-            cols = ['Sub_Metric', 'Parameter', 'mu_star_Mean', 'mu_star_Std', 'sigma_Mean', 'sigma_Std']
-            agg_df = agg_df[cols]
+                    indiv_columns['Sub_Metric'].append(np.full(num_vars, sub_metric_name, dtype=object))
+                    indiv_columns['Replication_Seed'].append(np.full(num_vars, seed))
+                    indiv_columns['Parameter'].append(param_names_arr)
+                    indiv_columns['mu_star'].append(np.asarray(mu_star))
+                    indiv_columns['sigma'].append(np.asarray(sigma))
+
+                # -- Aggregation --
+                agg_columns['Sub_Metric'].extend([sub_metric_name] * num_vars)
+                agg_columns['Parameter'].extend(problem['names'])
+                agg_columns['mu_star_Mean'].extend(mu_arr.mean(axis=0).tolist())
+                agg_columns['mu_star_Std'].extend(mu_arr.std(axis=0).tolist())
+                agg_columns['sigma_Mean'].extend(sigma_arr.mean(axis=0).tolist())
+                agg_columns['sigma_Std'].extend(sigma_arr.std(axis=0).tolist())
+
+            # -- Compile Tables --
+            if agg_columns['Parameter']:
+                agg_df = pd.DataFrame(agg_columns)
+                agg_df[['Sub_Metric', 'Parameter']] = agg_df[['Sub_Metric', 'Parameter']].astype('category')
             
-            clean_name = "".join(c for c in root_var if c.isalnum() or c in (' ', '_')).rstrip()
-            sheet_name = f"Agg_{clean_name}"[:31]
-            sheets_to_save[sheet_name] = agg_df
+                clean_name = "".join(c for c in root_var if c.isalnum() or c in (' ', '_')).rstrip()
+                sheet_name = f"Agg_{clean_name}"[:31]
+                sheets_to_save[sheet_name] = agg_df
 
-        if root_individual_results:
-            indiv_df = pd.concat(root_individual_results, ignore_index=True)
-            clean_name = "".join(c for c in root_var if c.isalnum() or c in (' ', '_')).rstrip()
-            sheet_name = f"Indiv_{clean_name}"[:31]
-            sheets_to_save[sheet_name] = indiv_df
+            if indiv_columns['mu_star']:
+                indiv_df = pd.DataFrame({col: np.concatenate(arrays) for col, arrays in indiv_columns.items()})
+                indiv_df[['Sub_Metric', 'Parameter']] = indiv_df[['Sub_Metric', 'Parameter']].astype('category')
+                clean_name = "".join(c for c in root_var if c.isalnum() or c in (' ', '_')).rstrip()
+                sheet_name = f"Indiv_{clean_name}"[:31]
+                sheets_to_save[sheet_name] = indiv_df
 
     # --- 5. Save All Results ---
     print(f"\n\n========================================================")
@@ -420,7 +503,7 @@ def analyze_morris_results():
     )
 
     try:
-        with pd.ExcelWriter(COMBINED_RESULTS_FILE) as writer:
+        with pd.ExcelWriter(COMBINED_RESULTS_FILE, engine='xlsxwriter') as writer:
             for sheet_name, df in sorted_sheets:
                 print(f"  Saving sheet: {sheet_name}")
                 df.to_excel(writer, sheet_name=sheet_name, index=False, float_format="%.4f")
@@ -430,5 +513,14 @@ def analyze_morris_results():
     except Exception as e:
         print(f"[ERROR] Failed to save Excel. {e}")
 
+    # Parquet copy of every sheet (full precision) for programmatic consumers
+    try:
+        os.makedirs(PARQUET_RESULTS_DIR, exist_ok=True)
+        for sheet_name, df in sorted_sheets:
+            df.to_parquet(os.path.join(PARQUET_RESULTS_DIR, f"{sheet_name}.parquet"), index=False)
+        print(f"Saved Parquet copies to '{PARQUET_RESULTS_DIR}'")
+    except Exception as e:
+        print(f"[ERROR] Failed to save Parquet. {e}")
+
 if __name__ == '__main__':
     analyze_morris_results()
\ No newline at end of file
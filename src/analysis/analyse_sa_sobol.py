@@ -10,10 +10,10 @@ the corresponding model output files (pickles). It performs the following steps:
 2.  Loads the `sa_variables.csv` to define the SALib 'problem' dictionary,
     including parameter names and bounds.
 3.  Defines a list of `OUTPUT_VARIABLES_TO_ANALYZE`.
-4.  Iterates through every row in the parameter map. For each run, it:
+4.  Iterates through every row in the parameter map (in a process pool). For each run, it:
     a. Finds the correct output folder using `get_output_path()`.
     b. Finds the specific `.pkl` output file by matching the `FILES_PREFIX`
-       and the `Replication_Seed`.
+       and the `Replication_Seed` (each folder is scanned only once).
     c. Reads the pickle file and extracts the last row's value for ALL
        variables in the `OUTPUT_VARIABLES_TO_ANALYZE` list.
     d. Stores these values in new 'Y_[variable_name]' columns.
@@ -25,7 +25,9 @@ the corresponding model output files (pickles). It performs the following steps:
     b. Calculates an aggregated table showing the mean/std of the
        S1/ST indices across all replications.
 7.  It saves all results (both individual and aggregated for all output
-    variables) to a single Excel file: `sa_results_combined.xlsx`,
+    variables) either as Parquet files in `sa_results_parquet/`
+    (`sa_agg_*.parquet`, `sa_indiv_*.parquet`) or, if `SAVE_FORMAT` is
+    'excel', to a single Excel file: `sa_results_combined.xlsx`,
     using separate worksheets for each result.
 
 :Authors:
@@ -36,9 +38,17 @@ import sys
 import os
 import pandas as pd
 import numpy as np
-import glob
+import multiprocessing
+import json
+import hashlib
 from SALib.analyze import sobol
 
+try:
+    from numba import njit, prange
+    use_numba = True
+except ImportError:
+    use_numba = False
+
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 src_dir = os.path.dirname(current_dir)
@@ -46,6 +56,7 @@ if src_dir not in sys.path:
     sys.path.insert(0, src_dir)
 
 from helpers.config import settings, get_output_path
+from helpers.utils import index_pickle_folders, read_last_row
 
 #Define Constants ---
 
@@ -55,11 +66,25 @@ PARAM_MAP_FILE = os.path.join(ANALYSIS_DIR, 'sobol_param_map.csv')
 VARS_FILE = os.path.join(ANALYSIS_DIR, 'sa_variables.csv')
 # Define output file path
 COMBINED_RESULTS_FILE = os.path.join(ANALYSIS_DIR, 'sa_results_combined.xlsx')
+PARQUET_RESULTS_DIR = os.path.join(ANALYSIS_DIR, 'sa_results_parquet')
+# Output format of the results: 'parquet' (one file per table, fast) or 'excel'
+# (all tables as worksheets of COMBINED_RESULTS_FILE)
+SAVE_FORMAT = 'parquet'
+# Cache of the parameter map with the gathered outputs ('Y_' columns), reused
+# as long as neither the parameter map file nor any model output pickle changed
+GATHER_CACHE_FILE = os.path.join(ANALYSIS_DIR, 'sobol_gathered_outputs.parquet')
+GATHER_CACHE_META_FILE = os.path.join(ANALYSIS_DIR, 'sobol_gathered_outputs.json')
+USE_GATHER_CACHE = False
 
 # Analysis parameters
 FILES_PREFIX = 'DEZ_Baseline'
 SEED_SEQUENCE_LENGTH = 8
 N_SAMPLES = settings.experiments.sa_nsamples
+# Print the result tables of every replication and variable to the console
+# (they are saved in any case)
+VERBOSE = False
+# Processes used by SALib for the parallel bootstrap of confidence intervals
+SOBOL_N_PROCESSORS = max(1, (os.cpu_count() or 1) - 1)
 
 # --- 1. DEFINE YOUR OUTPUT VARIABLES ---
 # List all output variables you want to analyze from the model.
@@ -70,6 +95,172 @@ OUTPUT_VARIABLES_TO_ANALYZE = [
 # ---------------------------------------
 
 
+if use_numba:
+    @njit(parallel=True, cache=True)
+    def _mean_std_columns(arr):
+        """
+        Computes the mean and (population) std of every column in one parallel pass.
+        """
+        n_rows, n_cols = arr.shape
+        mean = np.empty(n_cols)
+        std = np.empty(n_cols)
+        for j in prange(n_cols):
+            total = 0.0
+            for i in range(n_rows):
+                total += arr[i, j]
+            m = total / n_rows
+            sq = 0.0
+            for i in range(n_rows):
+                d = arr[i, j] - m
+                sq += d * d
+            mean[j] = m
+            std[j] = np.sqrt(sq / n_rows)
+        return mean, std
+
+
+def aggregate_indices(indices):
+    """
+    Calculates the mean and std of Sobol indices across replications.
+
+    If numba is installed, both statistics are computed in one fused parallel
+    loop; otherwise `np.mean`/`np.std` are used.
+
+    Args:
+        indices (np.ndarray): 2D array of indices (replications x parameters).
+
+    Returns:
+        tuple: (mean, std) - arrays with one value per parameter.
+    """
+    arr = np.ascontiguousarray(indices, dtype=np.float64)
+    if use_numba:
+        return _mean_std_columns(arr)
+    return arr.mean(axis=0), arr.std(axis=0)
+
+
+def _load_one(args):
+    """
+    Reads the output pickle of one run and extracts the last row's
+    value of every variable in `OUTPUT_VARIABLES_TO_ANALYZE`.
+
+    Module-level so that it can be used by a `multiprocessing.Pool`.
+
+    Args:
+        args (tuple): (index, run_id, seed, files_found) - the row position in the
+            parameter map, the run ID, the replication seed and the matching
+            pickle files from `index_pickle_folders`.
+
+    Returns:
+        tuple: (index, values, processed) - the row position, a dict of the found
+            variable values and whether an output file was read.
+    """
+    index, run_id, seed, files_found = args
+    values = {}
+    try:
+        if not files_found:
+            seed_sequence = str(seed) * SEED_SEQUENCE_LENGTH
+            print(f"  [WARN] Run {run_id}, Seed {seed}: No output file model_df_{FILES_PREFIX}_*_{seed_sequence}.pkl found.")
+            return index, values, False
+        
+        if len(files_found) > 1:
+            print(f"  [WARN] Run {run_id}, Seed {seed}: Found {len(files_found)} matching files. Using first one: {files_found[0]}")
+        
+        file_path = files_found[0]
+        
+        # Read the last row of the output
+        last_row = read_last_row(file_path, OUTPUT_VARIABLES_TO_ANALYZE)
+
+        if last_row is None:
+            print(f"  [WARN] Run {run_id}, Seed {seed}: Output file is empty: {file_path}")
+            return index, values, True
+        
+        # Loop through all requested variables and extract them
+        for var_name in OUTPUT_VARIABLES_TO_ANALYZE:
+            if var_name not in last_row:
+                if index < 5: # Only print first few errors to avoid spam
+                    print(f"  [WARN] Run {run_id}, Seed {seed}: Output variable '{var_name}' not in file: {file_path}")
+                continue
+            
+            values[var_name] = last_row[var_name]
+        return index, values, True
+
+    except Exception as e:
+        print(f"  [ERROR] Run {run_id}, Seed {seed}: Failed to process. Error: {e}")
+        return index, values, False
+
+
+def pickle_fingerprint(folder_index):
+    """
+    Hashes path, size and modification time of every indexed model output pickle.
+
+    Args:
+        folder_index (dict): Result of `index_pickle_folders`.
+
+    Returns:
+        str: Hex digest that changes whenever a pickle is added, removed or rewritten.
+    """
+    paths = sorted({path for files in folder_index.values()
+                    for seed_paths in files.values() for path in seed_paths})
+    digest = hashlib.sha1()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def load_gathered_outputs(n_rows, fingerprint):
+    """
+    Loads the parameter map with gathered 'Y_' columns from a previous run.
+
+    The cache is only used if it was built from the current `PARAM_MAP_FILE`
+    (same modification time) and the same model output pickles (see
+    `pickle_fingerprint`) with the same `FILES_PREFIX`, has `n_rows` rows
+    and covers all `OUTPUT_VARIABLES_TO_ANALYZE`.
+
+    Args:
+        n_rows (int): Number of rows of the current parameter map.
+        fingerprint (str): `pickle_fingerprint` of the current model outputs.
+
+    Returns:
+        pd.DataFrame: The cached parameter map, or None if there is no valid cache.
+    """
+    try:
+        with open(GATHER_CACHE_META_FILE, 'r') as f:
+            meta = json.load(f)
+        if (meta.get('param_map_mtime') != os.path.getmtime(PARAM_MAP_FILE)
+                or meta.get('files_prefix') != FILES_PREFIX
+                or meta.get('pickle_fingerprint') != fingerprint):
+            return None
+        cached_df = pd.read_parquet(GATHER_CACHE_FILE)
+    except (OSError, ValueError):
+        return None
+
+    if len(cached_df) != n_rows:
+        return None
+    if any(f'Y_{var}' not in cached_df.columns for var in OUTPUT_VARIABLES_TO_ANALYZE):
+        return None
+    return cached_df
+
+
+def save_gathered_outputs(param_map_df, fingerprint):
+    """
+    Stores the parameter map with the gathered 'Y_' columns for later runs.
+
+    Args:
+        param_map_df (pd.DataFrame): Parameter map including the 'Y_' columns.
+        fingerprint (str): `pickle_fingerprint` of the model outputs that were read.
+    """
+    try:
+        param_map_df.to_parquet(GATHER_CACHE_FILE, index=False)
+        with open(GATHER_CACHE_META_FILE, 'w') as f:
+            json.dump({
+                'param_map_mtime': os.path.getmtime(PARAM_MAP_FILE),
+                'files_prefix': FILES_PREFIX,
+                'pickle_fingerprint': fingerprint
+            }, f)
+    except Exception as e:
+        print(f"[WARN] Could not cache the gathered outputs to '{GATHER_CACHE_FILE}': {e}")
+
+
 def analyze_sa_results():
     """
     Main function to load data, gather outputs, and run Sobol analysis
@@ -89,12 +280,11 @@ def analyze_sa_results():
     print(f"Loaded '{PARAM_MAP_FILE}' ({len(param_map_df)} runs).")
     print(f"Loaded '{VARS_FILE}' ({len(sa_vars_df)} parameters).")
     
-    # Create new 'Y' columns for each output variable
+    # Check the new 'Y' columns for each output variable (filled after gathering)
     for var_name in OUTPUT_VARIABLES_TO_ANALYZE:
         col_name = f'Y_{var_name}'
         if col_name in param_map_df.columns:
             print(f"Warning: Column '{col_name}' already exists. It will be overwritten.")
-        param_map_df[col_name] = np.nan
 
     # Build SALib Problem
     print(f"\n--- 2. Building SALib Problem ---")
@@ -116,57 +306,46 @@ def analyze_sa_results():
     print(f"Searching for {len(OUTPUT_VARIABLES_TO_ANALYZE)} variables: {OUTPUT_VARIABLES_TO_ANALYZE}")
     print(f"Matching file prefix: '{FILES_PREFIX}'")
     
-    outputs_found_count = {var: 0 for var in OUTPUT_VARIABLES_TO_ANALYZE}
-    files_processed = 0
+    run_seed_rows = [(int(run_id), int(seed))
+                     for run_id, seed in param_map_df[['Run_id', 'Replication_Seed']].itertuples(index=False)]
+    # Scan each pickle folder once instead of globbing per row
+    folder_index = index_pickle_folders({run_id for run_id, _ in run_seed_rows}, FILES_PREFIX)
+
+    # Reuse the outputs gathered by a previous run if neither the parameter map
+    # nor the model outputs changed
+    fingerprint = pickle_fingerprint(folder_index) if USE_GATHER_CACHE else None
+    cached_df = load_gathered_outputs(len(param_map_df), fingerprint) if USE_GATHER_CACHE else None
+    if cached_df is not None:
+        print(f"Using outputs gathered previously: '{GATHER_CACHE_FILE}'")
+        print(f"(Set USE_GATHER_CACHE = False or delete the file to re-read the model outputs.)")
+        param_map_df = cached_df
+        y_arrays = {var: param_map_df[f'Y_{var}'].to_numpy(dtype=float) for var in OUTPUT_VARIABLES_TO_ANALYZE}
+        outputs_found_count = {var: int(np.count_nonzero(~np.isnan(arr))) for var, arr in y_arrays.items()}
+        files_processed = 0
+    else:
+        outputs_found_count = {var: 0 for var in OUTPUT_VARIABLES_TO_ANALYZE}
+        files_processed = 0
     
-    for index, row in param_map_df.iterrows():
-        try:
-            run_id = int(row['Run_id'])
-            seed = int(row['Replication_Seed'])
-            
-            # Get the folder path
-            pickle_folder = get_output_path(runid=run_id, subfolder='pickles')
-            
-            # Create the file search pattern
-            seed_sequence = str(seed) * SEED_SEQUENCE_LENGTH
-            search_pattern = os.path.join(pickle_folder, f"model_df_{FILES_PREFIX}_*_{seed_sequence}.pkl")
-            
-            # Find the file
-            files_found = glob.glob(search_pattern)
-            
-            if not files_found:
-                print(f"  [WARN] Run {run_id}, Seed {seed}: No output file found at: {search_pattern}")
-                continue
-            
-            if len(files_found) > 1:
-                print(f"  [WARN] Run {run_id}, Seed {seed}: Found {len(files_found)} matching files. Using first one: {files_found[0]}")
-            
-            file_path = files_found[0]
-            
-            # Read pickle and extract the output value
-            output_df = pd.read_pickle(file_path)
-            files_processed += 1
+        # Collect outputs by row position and assign each column once afterwards
+        y_arrays = {var: np.full(len(param_map_df), np.nan) for var in OUTPUT_VARIABLES_TO_ANALYZE}
+    
+        # Seed sequence (as used in the file names) of every seed, built once
+        seedseq_map = {seed: str(seed) * SEED_SEQUENCE_LENGTH for seed in {seed for _, seed in run_seed_rows}}
+        load_args = [(pos, run_id, seed, folder_index[run_id].get(seedseq_map[seed]))
+                     for pos, (run_id, seed) in enumerate(run_seed_rows)]
+    
+        with multiprocessing.Pool(os.cpu_count()) as pool:
+            for pos, values, processed in pool.imap_unordered(_load_one, load_args, chunksize=16):
+                files_processed += processed
+                for var_name, value in values.items():
+                    y_arrays[var_name][pos] = value
+                    outputs_found_count[var_name] += 1
 
-            if output_df.empty:
-                print(f"  [WARN] Run {run_id}, Seed {seed}: Output file is empty: {file_path}")
-                continue
-            
-            # Extract the last row
-            last_row = output_df.iloc[-1]
-            
-            # Loop through all requested variables and extract them
-            for var_name in OUTPUT_VARIABLES_TO_ANALYZE:
-                if var_name not in last_row:
-                    if index < 5: # Only print first few errors to avoid spam
-                        print(f"  [WARN] Run {run_id}, Seed {seed}: Output variable '{var_name}' not in file: {file_path}")
-                    continue
-                
-                value = last_row[var_name]
-                param_map_df.at[index, f'Y_{var_name}'] = value
-                outputs_found_count[var_name] += 1
+        for var_name, arr in y_arrays.items():
+            param_map_df[f'Y_{var_name}'] = arr
 
-        except Exception as e:
-            print(f"  [ERROR] Run {run_id}, Seed {seed}: Failed to process. Error: {e}")
+        if USE_GATHER_CACHE:
+            save_gathered_outputs(param_map_df, fingerprint)
 
     print(f"\nGathering complete. Processed {files_processed} files.")
     for var_name, count in outputs_found_count.items():
@@ -183,6 +362,14 @@ def analyze_sa_results():
     all_individual_dfs = {}
     all_aggregated_dfs = {}
     
+    # Row positions of each replication seed, computed once for all variables.
+    # A stable sort keeps the original (Saltelli) row order within each seed.
+    unique_seeds, seed_inverse, seed_counts = np.unique(
+        param_map_df['Replication_Seed'].to_numpy(), return_inverse=True, return_counts=True
+    )
+    seed_order = np.argsort(seed_inverse, kind='stable')
+    seed_to_idx = dict(zip(unique_seeds, np.split(seed_order, np.cumsum(seed_counts)[:-1])))
+    
     for output_var in OUTPUT_VARIABLES_TO_ANALYZE:
         print(f"\n\n========================================================")
         print(f"--- Running Analysis for: {output_var} ---")
@@ -203,21 +390,20 @@ def analyze_sa_results():
         # --- 4a. Run Analysis (Per Replication) ---
         print(f"\n--- 4a. Running Analysis (per Replication) ---")
     
-        unique_seeds = sorted(param_map_df['Replication_Seed'].unique())
-        all_s1_indices = []
-        all_st_indices = []
-        
-        all_results_list = []
+        # Indices of each analyzed replication (row) and parameter (column)
+        num_vars = problem['num_vars']
+        s1_mat = np.empty((len(unique_seeds), num_vars))
+        s1_conf_mat = np.empty((len(unique_seeds), num_vars))
+        st_mat = np.empty((len(unique_seeds), num_vars))
+        st_conf_mat = np.empty((len(unique_seeds), num_vars))
+        seeds_used = []
         
         for seed in unique_seeds:
             print(f"\n--- Analyzing Replication Seed: {seed} ---")
-            rep_data = param_map_df[param_map_df['Replication_Seed'] == seed].copy()
+            Y = y_arrays[output_var][seed_to_idx[seed]]
             
             # Drop NaNs for THIS specific output variable
-            rep_data.dropna(subset=[output_col_name], inplace=True)
-            
-            Y = rep_data[output_col_name].values
-            
+            Y = Y[~np.isnan(Y)]
             
             if len(Y) != N_SAMPLES * (2 * problem['num_vars'] + 2):
                 print(f"  Skipping seed {seed}: Not enough data points ({len(Y)}) found to run analysis.")
@@ -225,40 +411,51 @@ def analyze_sa_results():
                 continue
                 
             # Run the Sobol analysis
-            Si = sobol.analyze(problem, Y, calc_second_order=True, print_to_console=False)
+            Si = sobol.analyze(problem, Y, calc_second_order=True, print_to_console=False,
+                               parallel=SOBOL_N_PROCESSORS > 1, n_processors=SOBOL_N_PROCESSORS)
             
             # Store results for aggregation
-            all_s1_indices.append(Si['S1'])
-            all_st_indices.append(Si['ST'])
+            i = len(seeds_used)
+            s1_mat[i] = Si['S1']
+            s1_conf_mat[i] = Si['S1_conf']
+            st_mat[i] = Si['ST']
+            st_conf_mat[i] = Si['ST_conf']
+            seeds_used.append(seed)
             
             # Print results for this replication
-            print("  Results:")
-            results_df = pd.DataFrame({
-                'S1': Si['S1'],
-                'S1_conf': Si['S1_conf'],
-                'ST': Si['ST'],
-                'ST_conf': Si['ST_conf']
-            }, index=problem['names'])
-            print(results_df.to_string())
-
-            results_df_to_save = results_df.reset_index().rename(columns={'index': 'Parameter'})
-            results_df_to_save['Replication_Seed'] = seed
-            all_results_list.append(results_df_to_save)
-
-        if not all_results_list:
+            if VERBOSE:
+                print("  Results:")
+                results_df = pd.DataFrame({
+                    'S1': Si['S1'],
+                    'S1_conf': Si['S1_conf'],
+                    'ST': Si['ST'],
+                    'ST_conf': Si['ST_conf']
+                }, index=problem['names'])
+                print(results_df.to_string())
+
+        n_used = len(seeds_used)
+        s1_mat, s1_conf_mat = s1_mat[:n_used], s1_conf_mat[:n_used]
+        st_mat, st_conf_mat = st_mat[:n_used], st_conf_mat[:n_used]
+        
+        if not seeds_used:
             print("\nNo individual results were generated for this output variable.")
             individual_results_df = pd.DataFrame(columns=['Replication_Seed', 'Parameter', 'S1', 'S1_conf', 'ST', 'ST_conf'])
         else:
-            individual_results_df = pd.concat(all_results_list, ignore_index=True)
-            # Reorder columns for clarity
-            cols = ['Replication_Seed', 'Parameter', 'S1', 'S1_conf', 'ST', 'ST_conf']
-            individual_results_df = individual_results_df[cols]
-            print(f"\nSuccessfully consolidated {len(all_results_list)} individual replication results.")
+            # One tall table (seed-major, parameters in problem order) built in one go
+            individual_results_df = pd.DataFrame({
+                'Replication_Seed': np.repeat(seeds_used, num_vars),
+                'Parameter': np.tile(problem['names'], n_used),
+                'S1': s1_mat.ravel(),
+                'S1_conf': s1_conf_mat.ravel(),
+                'ST': st_mat.ravel(),
+                'ST_conf': st_conf_mat.ravel()
+            })
+            print(f"\nSuccessfully consolidated {n_used} individual replication results.")
 
         # --- 4b. Aggregate Final Results ---
-        print(f"\n\n--- 4b. Aggregated Results (Mean / Std across {len(all_s1_indices)} replications) ---")
+        print(f"\n\n--- 4b. Aggregated Results (Mean / Std across {n_used} replications) ---")
         
-        if not all_s1_indices:
+        if not seeds_used:
             print(f"No results to aggregate for '{output_var}'.")
             # Create empty DF
             final_results_df = pd.DataFrame(columns=[
@@ -266,10 +463,10 @@ def analyze_sa_results():
             ]).set_index('Parameter')
         else:
             # Calculate Mean and Std
-            s1_mean = np.mean(all_s1_indices, axis=0)
-            s1_std = np.std(all_s1_indices, axis=0)
-            st_mean = np.mean(all_st_indices, axis=0)
-            st_std = np.std(all_st_indices, axis=0)
+            # S1 and ST side by side, so that both are reduced in a single pass
+            mean, std = aggregate_indices(np.hstack((s1_mat, st_mat)))
+            s1_mean, st_mean = mean[:num_vars], mean[num_vars:]
+            s1_std, st_std = std[:num_vars], std[num_vars:]
 
             # Create final summary DataFrame
             final_results_df = pd.DataFrame({
@@ -280,13 +477,14 @@ def analyze_sa_results():
                 'ST_Std': st_std
             }).set_index('Parameter')
         
-        print(final_results_df.to_string(float_format="%.2f"))
+        if VERBOSE:
+            print(final_results_df.to_string(float_format="%.2f"))
 
         # Store DataFrames for saving later
         all_individual_dfs[output_var] = individual_results_df
         all_aggregated_dfs[output_var] = final_results_df.reset_index() # Reset index for saving
 
-    # --- 5. Save All Results to One Excel File ---
+    # --- 5. Save All Results (Parquet files or one Excel file) ---
     print(f"\n\n========================================================")
     print(f"--- 5. Saving All Results ---")
     print(f"========================================================")
@@ -295,8 +493,30 @@ def analyze_sa_results():
         print("No results were generated for any output variable. Nothing to save.")
         return
 
+    if SAVE_FORMAT == 'parquet':
+        try:
+            os.makedirs(PARQUET_RESULTS_DIR, exist_ok=True)
+            for var_name in all_aggregated_dfs.keys():
+                # Create clean file names (no invalid chars)
+                clean_name = "".join(c for c in var_name if c.isalnum() or c in (' ', '_')).strip().replace(' ', '_')
+                agg_file = os.path.join(PARQUET_RESULTS_DIR, f"sa_agg_{clean_name}.parquet")
+                indiv_file = os.path.join(PARQUET_RESULTS_DIR, f"sa_indiv_{clean_name}.parquet")
+                
+                print(f"  Saving '{var_name}' results to:")
+                print(f"    -> {agg_file}")
+                print(f"    -> {indiv_file}")
+                
+                all_aggregated_dfs[var_name].to_parquet(agg_file, index=False)
+                all_individual_dfs[var_name].to_parquet(indiv_file, index=False)
+            
+            print(f"\nSuccessfully saved all results to '{PARQUET_RESULTS_DIR}'")
+        except Exception as e:
+            print(f"\n[ERROR] Failed to save results to Parquet. Error: {e}")
+            print("Note: This operation requires the 'pyarrow' package. You may need to install it (`pip install pyarrow`)")
+        return
+
     try:
-        with pd.ExcelWriter(COMBINED_RESULTS_FILE) as writer:
+        with pd.ExcelWriter(COMBINED_RESULTS_FILE, engine='xlsxwriter') as writer:
             for var_name in all_aggregated_dfs.keys():
                 # Create clean sheet names (max 31 chars, no invalid chars)
                 clean_name = "".join(c for c in var_name if c.isalnum() or c in (' ', '_')).rstrip()
@@ -325,7 +545,7 @@ def analyze_sa_results():
         print(f"\nSuccessfully saved all results to '{COMBINED_RESULTS_FILE}'")
     except Exception as e:
         print(f"\n[ERROR] Failed to save combined results to Excel. Error: {e}")
-        print("Note: This operation requires the 'openpyxl' package. You may need to install it (`pip install openpyxl`)")
+        print("Note: This operation requires the 'xlsxwriter' package. You may need to install it (`pip install xlsxwriter`)")
 
 
 if __name__ == '__main__':
@@ -19,7 +19,8 @@ import sys
 import os
 import pandas as pd
 import numpy as np
-import glob
+import warnings
+from concurrent.futures import ProcessPoolExecutor
 
 # Adjust path to find helper modules
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -27,7 +28,8 @@ src_dir = os.path.dirname(current_dir)
 if src_dir not in sys.path:
     sys.path.insert(0, src_dir)
 
-from helpers.config import settings, get_output_path
+from helpers.config import settings
+from helpers.utils import get_pickle_folder, read_last_row
 
 # ==========================================
 # --- USER CONFIGURATION ---
@@ -66,53 +68,113 @@ RESULTS_FILE = os.path.join(
 # ==========================================
 
 
-def flatten_nested_dict(root_name, data_dict):
-    """
-    Recursively flattens a 2-level dictionary into a single dictionary
-    with composite keys. Preserves raw values.
+# Statistics per value column, in output order:
+# mean, median, std, min, max, Mean Absolute Deviation, 10th/90th percentile
+# (bounds of the 80% confidence interval), Coefficient of Variation (Std / Mean)
+STAT_NAMES = ['mean', 'median', 'std', 'min', 'max', 'mad', '10%', '90%', 'CV']
+
+def grouped_statistics(run_ids, values):
     """
-    flattened = {}
-    if not isinstance(data_dict, dict):
-        return flattened
-
-    for k1, v1 in data_dict.items():
-        # Level 1
-        if isinstance(v1, dict):
-            # Level 2
-            for k2, v2 in v1.items():
-                if isinstance(v2, (int, float, np.number)):
-                    col_name = f"{root_name}__{k1}__{k2}"
-                    flattened[col_name] = v2
-        elif isinstance(v1, (int, float, np.number)):
-            col_name = f"{root_name}__{k1}"
-            flattened[col_name] = v1
-            
-    return flattened
+    Calculates the summary statistics of every value column per Run ID.
 
-def get_mad(x):
-    """Calculate Mean Absolute Deviation (Pandas MAD is deprecated in some versions)"""
-    return (x - x.mean()).abs().mean()
+    Vectorized replacement of a `groupby().agg()` with Python callbacks: rows
+    are sorted by Run ID once and each group is reduced over all columns with
+    NaN-aware NumPy functions (NaNs are skipped, like in pandas).
 
-def p10(x):
-    """10th Percentile (Lower bound of 80% confidence interval)"""
-    return x.quantile(0.10)
+    Args:
+        run_ids (np.ndarray): Run ID of every row.
+        values (np.ndarray): 2D float array (rows x value columns).
 
-def p90(x):
-    """90th Percentile (Upper bound of 80% confidence interval)"""
-    return x.quantile(0.90)
+    Returns:
+        tuple: (unique_run_ids, stats) - the sorted Run IDs and a 3D array
+            (runs x value columns x statistics, ordered as `STAT_NAMES`).
+    """
+    unique_run_ids, inverse, counts = np.unique(run_ids, return_inverse=True, return_counts=True)
+    order = np.argsort(inverse, kind='stable')
+    bounds = np.concatenate(([0], np.cumsum(counts)))
+    sorted_values = values[order]
+
+    stats = np.empty((len(unique_run_ids), values.shape[1], len(STAT_NAMES)))
+    with warnings.catch_warnings(), np.errstate(divide='ignore', invalid='ignore'):
+        # All-NaN columns and single-seed groups yield NaN, as in pandas
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        for i in range(len(unique_run_ids)):
+            g = sorted_values[bounds[i]:bounds[i + 1]]
+            mean = np.nanmean(g, axis=0)
+            std = np.nanstd(g, axis=0, ddof=1)
+            p10, median, p90 = np.nanpercentile(g, [10, 50, 90], axis=0)
+            stats[i, :, 0] = mean
+            stats[i, :, 1] = median
+            stats[i, :, 2] = std
+            stats[i, :, 3] = np.nanmin(g, axis=0)
+            stats[i, :, 4] = np.nanmax(g, axis=0)
+            stats[i, :, 5] = np.nanmean(np.abs(g - mean), axis=0)
+            stats[i, :, 6] = p10
+            stats[i, :, 7] = p90
+            stats[i, :, 8] = np.where(mean == 0, 0.0, std / mean)
+    return unique_run_ids, stats
+
+def _extract_one(task):
+    """
+    Reads one model output file and extracts the configured output variables.
+
+    Top-level function so that it can be mapped over all files by a process pool.
 
-def cv(x):
-    """Coefficient of Variation (Std / Mean). Measure of relative volatility."""
-    mean = x.mean()
-    if mean == 0:
-        return 0.0
-    return x.std() / mean
+    Args:
+        task (tuple): (run_id, file_path) - the Run ID and the path of the pickle.
+
+    Returns:
+        dict: Run ID, seed and the raw output values of the file, or None if the
+            file is empty or could not be read.
+    """
+    run_id, file_path = task
+    try:
+        # Load the final state (last row)
+        last_row = read_last_row(file_path, SCALAR_OUTPUTS + DICT_OUTPUTS)
+        if last_row is None:
+            return None
+        
+        # Extract Seed from filename if possible, or just generate an index
+        # Assuming standard naming, split by underscore
+        filename = os.path.basename(file_path)
+        # Try to extract seed from filename string, fallback to 'Unknown'
+        try:
+            seed_str = filename.replace('.pkl', '').split('_')[-1]
+            seed_val = int(seed_str)
+        except:
+            seed_val = 0
+        
+        # Dictionary for this single run/seed combination
+        row_data = {
+            'Run_id': run_id,
+            'Replication_Seed': seed_val
+        }
+        
+        # A. Extract Scalars
+        for var in SCALAR_OUTPUTS:
+            if var in last_row:
+                row_data[var] = last_row[var]
+        
+        # B. Extract Dicts (Raw, flattened in one batch after the loop)
+        for var in DICT_OUTPUTS:
+            if var in last_row:
+                row_data[var] = last_row[var]
+        
+        return row_data
+        
+    except Exception as e:
+        print(f"  [ERROR] Reading {os.path.basename(file_path)}: {e}")
+        return None
 
 def main():
     print(f"--- Starting Summary Statistics Analysis ---")
     print(f"Range: Run {START_ID} to {END_ID}")
     
     all_extracted_data = []
+    # (run_id, file_path) of every pickle to read
+    extraction_tasks = []
+    # Pickle folder -> names of the pickle files in it, so each folder is listed only once
+    folder_cache = {}
     
     # --- 1. Data Extraction Loop ---
     # Iterate through the requested Run IDs (similar to slurm management)
@@ -120,7 +182,7 @@ def main():
         
         # Construct path to pickles for this run
         try:
-            pickle_folder = get_output_path(runid=run_id, subfolder='pickles')
+            pickle_folder = get_pickle_folder(run_id)
         except Exception as e:
             print(f"[WARN] Could not determine path for Run {run_id}: {e}")
             continue
@@ -131,8 +193,12 @@ def main():
 
         # Find ALL pickle files for this run (ignoring seed number in filename to get all)
         # Pattern assumes: model_df_{PREFIX}_{RunID}_{Seed}.pkl
-        search_pattern = os.path.join(pickle_folder, f"model_df_{FILES_PREFIX}_{run_id}_*.pkl")
-        files_found = glob.glob(search_pattern)
+        if pickle_folder not in folder_cache:
+            with os.scandir(pickle_folder) as entries:
+                folder_cache[pickle_folder] = [e.name for e in entries if e.name.endswith('.pkl')]
+        run_prefix = f"model_df_{FILES_PREFIX}_{run_id}_"
+        files_found = [os.path.join(pickle_folder, name)
+                       for name in folder_cache[pickle_folder] if name.startswith(run_prefix)]
         
         if not files_found:
             # print(f"[INFO] No files found for Run {run_id}")
@@ -140,82 +206,44 @@ def main():
             
         print(f"Processing Run {run_id}: Found {len(files_found)} seeds.")
 
-        for file_path in files_found:
-            try:
-                # Load Data
-                df = pd.read_pickle(file_path)
-                if df.empty:
-                    continue
-                
-                # Take the final state (last row)
-                last_row = df.iloc[-1]
-                
-                # Extract Seed from filename if possible, or just generate an index
-                # Assuming standard naming, split by underscore
-                filename = os.path.basename(file_path)
-                # Try to extract seed from filename string, fallback to 'Unknown'
-                try:
-                    seed_str = filename.replace('.pkl', '').split('_')[-1]
-                    seed_val = int(seed_str)
-                except:
-                    seed_val = 0
-                
-                # Dictionary for this single run/seed combination
-                row_data = {
-                    'Run_id': run_id,
-                    'Replication_Seed': seed_val
-                }
-                
-                # A. Extract Scalars
-                for var in SCALAR_OUTPUTS:
-                    if var in last_row:
-                        row_data[var] = last_row[var]
-                
-                # B. Extract Dicts (Flattened, Raw)
-                for var in DICT_OUTPUTS:
-                    if var in last_row:
-                        # Direct flattening, no pre-processing/rate calculation
-                        flat_dict = flatten_nested_dict(var, last_row[var])
-                        row_data.update(flat_dict)
-                
+        extraction_tasks.extend((run_id, file_path) for file_path in files_found)
+
+    # Read the files of all runs in parallel
+    with ProcessPoolExecutor() as executor:
+        for row_data in executor.map(_extract_one, extraction_tasks, chunksize=16):
+            if row_data is not None:
                 all_extracted_data.append(row_data)
-                
-            except Exception as e:
-                print(f"  [ERROR] Reading {os.path.basename(file_path)}: {e}")
 
     # --- 2. Check Data ---
     if not all_extracted_data:
         print("\nNo data extracted. Exiting.")
         return
 
-    full_df = pd.DataFrame(all_extracted_data)
+    # Flatten the nested dicts of all records at once into composite
+    # "Variable__Key1__Key2" columns (2 levels, no pre-processing/rate calculation)
+    full_df = pd.json_normalize(all_extracted_data, sep='__', max_level=2)
     print(f"\nExtraction Complete. Total records: {len(full_df)}")
 
     # Identify value columns (exclude ID cols)
     id_cols = ['Run_id', 'Replication_Seed']
+    # Coerce every leaf to numbers (missing keys and non-numeric values become NaN)
+    # and skip only columns without any numeric value
     value_cols = [c for c in full_df.columns if c not in id_cols]
+    full_df[value_cols] = full_df[value_cols].apply(pd.to_numeric, errors='coerce')
+    value_cols = [c for c in value_cols if full_df[c].notna().any()]
+    full_df = full_df[id_cols + value_cols]
 
     # --- 3. Calculation: Group by Run_ID ---
     print("Calculating statistics...")
     
-    # Define aggregations
-    agg_funcs = ['mean', 'median', 'std', 'min', 'max', get_mad, p10, p90, cv]
-    
-    # Group by Run_id and apply functions to all value columns
-    # resulting in a MultiIndex columns
-    grouped_df = full_df.groupby('Run_id')[value_cols].agg(agg_funcs)
-    
-    # Rename custom functions for cleaner headers
-    grouped_df = grouped_df.rename(columns={
-        'get_mad': 'mad',
-        'p10': '10%',
-        'p90': '90%',
-        'cv': 'CV'
-    }, level=1)
+    run_ids, stats = grouped_statistics(
+        full_df['Run_id'].to_numpy(), full_df[value_cols].to_numpy(dtype=float)
+    )
 
     # Flatten Column Names: "Variable" + "Mean" -> "Variable_mean"
-    grouped_df.columns = [f"{col[0]}_{col[1]}" for col in grouped_df.columns]
-    grouped_df.reset_index(inplace=True)
+    stat_columns = [f"{col}_{stat}" for col in value_cols for stat in STAT_NAMES]
+    grouped_df = pd.DataFrame(stats.reshape(len(run_ids), -1), columns=stat_columns)
+    grouped_df.insert(0, 'Run_id', run_ids)
 
     # --- 4. Detailed View Preparation (Optional) ---
     detailed_df = pd.DataFrame()
@@ -236,7 +264,7 @@ def main():
     # --- 5. Save to Excel ---
     print(f"Saving to {RESULTS_FILE}...")
     try:
-        with pd.ExcelWriter(RESULTS_FILE) as writer:
+        with pd.ExcelWriter(RESULTS_FILE, engine='xlsxwriter') as writer:
             # Sheet 1: The Summary (Aggregated)
             grouped_df.to_excel(writer, sheet_name='Summary_Statistics', index=False, float_format="%.4f")
             
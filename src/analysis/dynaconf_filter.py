@@ -12,20 +12,49 @@ Authors:
  - Sascha Holzhauer <sascha.holzhauer@uni-kassel.de>
 
 """
+import copy
+import os
+
 from dynaconf.base import SourceMetadata
 from dynaconf.utils import upperfy
-from dynaconf.constants import TOML_EXTENSIONS
-from dynaconf.loaders.base import BaseLoader
 from dynaconf.vendor import tomllib
 
+# Parsed TOML data by (file path, modification time in ns)
+_PARSE_CACHE = {}
+
+
+def _parse_toml(found_file):
+    """
+    Parses a TOML file, reusing the result as long as the file is unchanged.
+
+    Parameters
+    ----------
+    found_file : str
+        Path of the TOML file.
+
+    Returns
+    -------
+    dict
+        A copy of the parsed data (Dynaconf may modify merged dicts in place).
+    """
+    cache_key = (found_file, os.stat(found_file).st_mtime_ns)
+    fdata = _PARSE_CACHE.get(cache_key)
+    if fdata is None:
+        with open(found_file, "rb") as f:
+            fdata = tomllib.load(f)
+        _PARSE_CACHE[cache_key] = fdata
+    return copy.deepcopy(fdata)
+
+
 def load(obj, env=None, silent=True, key=None, filename=None):
     """
     Loads settings from TOML files without overriding existing values.
 
     This function iterates through a list of filenames defined in the settings
-    variable `EVAL.AHID_SETTINGS_FILES`. For each file, it parses the content
+    variable `EVAL.AHID_SETTINGS_FILES`. It parses the content of each file
     and merges it into the main settings object (`obj`) under the condition
-    that the keys do not already exist.
+    that the keys do not already exist. The data of all files is applied in a
+    single `obj.update`, earlier files taking precedence over later ones.
 
     The merging logic is as follows:
     1. If a top-level key from the file is not in `obj`, the key and its
@@ -51,44 +80,52 @@ def load(obj, env=None, silent=True, key=None, filename=None):
         relies on the `EVAL.AHID_SETTINGS_FILES` list in `obj`. Defaults to None.
 
     """
+    # Data of all files is collected and merged into `obj` in one update.
+    # Earlier files take precedence, as if each file was merged in turn.
+    data = {"dynaconf_merge": True}
+    data_keys = {}  # upper-cased key -> key used in `data`
+    found_files = []
+    
+    # Snapshot the existing top-level keys once instead of probing obj per key
+    existing = {upperfy(k) for k in obj.store.keys()}
+    
     for filename in obj.get("EVAL.AHID_SETTINGS_FILES", []):
         found_file = obj.find_file(filename)
         if not found_file:
             continue
+        found_files.append(found_file)
         
-        # IMPLEMENT YOUR LOGIC HERE
         # parse the file data
-        # traverse the data checking if is already set on `obj`
-        # build a dictionary with the data to be merged omiting the 
-        # existing data to avoid override.
-        
-        loader = BaseLoader(
-            obj=obj,
-            env=None,
-            identifier="toml",
-            extensions=TOML_EXTENSIONS,
-            file_reader=tomllib.load,
-            string_reader=tomllib.loads,
-            opener_params={"mode": "rb"},
-            validate=False,
-        )
-        
-        fdata = loader.get_source_data([found_file])[found_file]
-        data = {"dynaconf_merge": True}
+        # traverse the data checking if is already set on `obj` (or added by
+        # a previous file) and omit the existing data to avoid override.
+        fdata = _parse_toml(found_file)
         
         for key, value in fdata.items():
-            if not obj.exists(key):
+            ukey = upperfy(key)
+            if ukey not in existing and ukey not in data_keys:
+                data_keys[ukey] = key
                 data[key] = value
-            else:
-                data[key] = {}
+            elif ukey in existing:
+                obj_sub = obj[key]
+                existing_sub = set(obj_sub.keys()) if hasattr(obj_sub, "keys") else set()
+                merged_sub = data.setdefault(data_keys.setdefault(ukey, key), {})
                 for subkey, subvalue in value.items():
-                    if subkey not in obj[key]:
-                        data[key][subkey] = subvalue
-                
-        # UPDATE THE SETTINGS WITH DATA
-        source_metadata = SourceMetadata("plugin", found_file, "default")
-        obj.update(data, loader_identifier=source_metadata)
-            
-            
+                    if subkey not in existing_sub and subkey not in merged_sub:
+                        merged_sub[subkey] = subvalue
+            else:
+                merged_sub = data[data_keys[ukey]]
+                if isinstance(merged_sub, dict) and isinstance(value, dict):
+                    for subkey, subvalue in value.items():
+                        if subkey not in merged_sub:
+                            merged_sub[subkey] = subvalue
+    
+    if not found_files:
+        return
+    
+    # UPDATE THE SETTINGS WITH DATA
+    source_metadata = SourceMetadata("plugin", ", ".join(found_files), "default")
+    obj.update(data, loader_identifier=source_metadata)
+
+
 if __name__ == '__main__':
     pass
\ No newline at end of file
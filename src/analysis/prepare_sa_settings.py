@@ -10,8 +10,10 @@ This script automates the setup for SA by performing the following steps:
     - For 'morris', it uses `morris.sample` (generating N*(D+1) samples).
     - For 'lhs', it uses `scipy.stats.qmc` with Maximin optimization (generating N samples).
 5.  Creates replicated parameter sets for stochasticity.
-6.  Saves the final parameter sets to `settings_SOBOL.xlsx`, `settings_MORRIS.xlsx`
-    or `settings_LHS.xlsx`.
+6.  Saves the final parameter sets to `settings_SOBOL.parquet`, `settings_MORRIS.parquet`
+    or `settings_LHS.parquet` (set `main.excel_scenario_file` to this file to run
+    them). If `experiments.sa_emit_xlsx` is set, the first rows are additionally
+    written to an `.xlsx` file of the same name for review.
 7.  Saves a "parameter map" (e.g., `lhs_param_map.csv`) to the analysis
     folder to link run IDs to outputs for the analysis step.
 
@@ -24,8 +26,9 @@ This script automates the setup for SA by performing the following steps:
 import sys
 import os
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from SALib.sample import saltelli, morris
-from pyDOE2 import ff2n
 from scipy.stats import qmc
 import numpy as np
 
@@ -51,7 +54,10 @@ BASE_SETTINGS_FILE = os.path.join(SETTINGS_DIR, 'settings.xlsx')
 SA_VARS_FILE = os.path.join(ANALYSIS_DIR, 'sa_variables.csv')
 
 # Output files
-SA_SETTINGS_FILE = os.path.join(SETTINGS_DIR, f'settings_{SA_METHOD.upper()}.xlsx')
+SA_SETTINGS_FILE = os.path.join(SETTINGS_DIR, f'settings_{SA_METHOD.upper()}.parquet')
+SA_SETTINGS_PREVIEW_FILE = os.path.join(SETTINGS_DIR, f'settings_{SA_METHOD.upper()}.xlsx')
+# Number of rows written to the optional Excel preview
+XLSX_PREVIEW_ROWS = 1000
 SA_MAP_FILE = os.path.join(ANALYSIS_DIR, f'{SA_METHOD}_param_map.csv')
 
 # --- Set SA Parameters ---
@@ -76,6 +82,16 @@ SEED_COLUMNS = [
     'seeds.houseowner_run', 'seeds.plumber_run'
 ]
 
+def full_factorial_design(num_vars):
+    """
+    Two-level full factorial design (2^num_vars rows, num_vars columns) of 0 (min)
+    and 1 (max) levels. Bit j of the row index selects the level of variable j,
+    giving the same row order as pyDOE2's ff2n with the first column varying fastest.
+    """
+    rows = np.arange(2**num_vars, dtype=np.uint32)
+    return ((rows[:, None] >> np.arange(num_vars, dtype=np.uint32)) & 1).astype(np.uint8)
+
+
 def generate_sa_settings():
     """
     Main function to manage the generation of the SA settings file.
@@ -88,7 +104,6 @@ def generate_sa_settings():
         if base_settings_df.empty:
             print(f"Error: Base settings file is empty: {BASE_SETTINGS_FILE}")
             return
-        default_settings = base_settings_df.iloc[0].copy()
 
         sa_vars_df = pd.read_csv(SA_VARS_FILE)
 
@@ -150,16 +165,15 @@ def generate_sa_settings():
             print("This may crash the computer or take forever to save. Exiting.")
             exit()
 
-        # 1. Generate Design Matrix (2^k rows, k columns)
-        # Returns matrix of -1.0 and 1.0
-        design_matrix = ff2n(num_vars)
+        # 1. Generate Design Matrix (2^k rows, k columns) of 0 (min) and 1 (max)
+        design_bits = full_factorial_design(num_vars)
 
-        # 2. Scale samples from [-1, 1] to [min, max]
+        # 2. Scale samples from {0, 1} to {min, max}
         l_bounds = np.array([b[0] for b in problem['bounds']])
         u_bounds = np.array([b[1] for b in problem['bounds']])
         
-        # Scaling formula: min + ((val + 1) / 2) * (max - min)
-        param_values = l_bounds + (design_matrix + 1) / 2 * (u_bounds - l_bounds)
+        # Scaling formula: min + bit * (max - min)
+        param_values = l_bounds + design_bits * (u_bounds - l_bounds)
 
         num_base_runs = param_values.shape[0]
         print(f"Generated {num_base_runs} base Full Factorial samples.")
@@ -170,76 +184,87 @@ def generate_sa_settings():
         return
 
     # --- Create the new SA Settings DataFrame ---
-    new_settings_list = []
-    sa_map_list = [] 
     sa_param_names = problem['names']
+    columns = base_settings_df.columns
+    col_pos = {name: k for k, name in enumerate(columns)}
 
-    available_seed_cols = [col for col in SEED_COLUMNS if col in default_settings.index]
+    available_seed_cols = [col for col in SEED_COLUMNS if col in col_pos]
     print(f"\nWill manage {len(available_seed_cols)} seed columns.")
 
-    total_run_counter = 0
-
-    # Outer loop for replications
-    for r in range(N_REPLICATIONS):
-        current_seed_value = r
-        print(f"Generating sample set {r}/{N_REPLICATIONS - 1}...")
-
-        # Inner loop for the parameter sets
-        for i, param_set in enumerate(param_values):
-            new_row = default_settings.copy()
-            map_row = {} 
-
-            if 'ID' in new_row:
-                new_row['ID'] = total_run_counter
-            
-            if 'main.run_id' in new_row:
-                 new_row['main.run_id'] = i
-            
-            map_row['Run_id'] = i
-            map_row['Replication_Seed'] = current_seed_value
-
-            for seed_col in available_seed_cols:
-                new_row[seed_col] = current_seed_value
-            
-            new_row['experiments.sa_active'] = True
-
-            for j, name in enumerate(sa_param_names):
-                if name not in new_row:
-                    continue
-
-                new_val = param_set[j]
-                var_type = sa_vars_df.loc[sa_vars_df['name'] == name, 'type'].values[0]
-
-                if var_type == 'int':
-                    new_val = int(round(new_val))
-                elif var_type == 'float':
-                    new_val = float(new_val)
-
-                new_row[name] = new_val
-                map_row[name] = new_val 
-
-            new_settings_list.append(new_row)
-            sa_map_list.append(map_row) 
-            
-            total_run_counter += 1
-
-    # Create the final DataFrames
-    sa_settings_df = pd.DataFrame(new_settings_list)
-    sa_map_df = pd.DataFrame(sa_map_list)
-
-    try:
-        sa_settings_df = sa_settings_df[base_settings_df.columns]
-    except KeyError:
-        pass
-
-    # Save the Output Files
+    # Rows are ordered replication-major: replication r holds rows
+    # r*num_base_runs ... (r+1)*num_base_runs-1, one per parameter set.
+    # Replications are written one at a time, so only one replication's
+    # rows are held in memory.
+    total_rows = num_base_runs * N_REPLICATIONS
+    print(f"Generating {N_REPLICATIONS} sample sets of {num_base_runs} rows...")
+    run_ids = np.arange(num_base_runs)
+
+    # Build the replication template column by column. Every column starts from
+    # its default value, keeping the dtype it has in the base settings.
+    default_values = base_settings_df.iloc[0]
+    settings_columns = {}
+    for col in columns:
+        dtype = base_settings_df[col].dtype
+        settings_columns[col] = np.full(num_base_runs, default_values[col],
+                                        dtype=dtype if isinstance(dtype, np.dtype) else object)
+
+    if 'main.run_id' in col_pos:
+        settings_columns['main.run_id'] = run_ids
+    if 'experiments.sa_active' in col_pos:
+        settings_columns['experiments.sa_active'] = np.ones(num_base_runs, dtype=bool)
+
+    # SA parameters (only those present in the settings). Int-typed ones are
+    # rounded once on the base samples, which every replication shares.
+    present = np.array([name in col_pos for name in sa_param_names], dtype=bool)
+    sa_cols = [name for name, is_present in zip(sa_param_names, present) if is_present]
+    types_array = sa_vars_df['type'].to_numpy()
+    int_mask = (types_array == 'int')[present]
+    # Column selection already copies, so the int columns are rounded in place
+    base_params = param_values[:, present]
+    for j in np.flatnonzero(int_mask):
+        np.rint(base_params[:, j], out=base_params[:, j])
+    for j, name in enumerate(sa_cols):
+        values = base_params[:, j].astype(np.int64) if int_mask[j] else base_params[:, j]
+        settings_columns[name] = values
+
+    # Save the Output Files, one replication (and Parquet row group) at a time
     try:
-        sa_settings_df.to_excel(SA_SETTINGS_FILE, index=False)
+        preview_parts = []
+        preview_rows = 0
+        writer = None
+        try:
+            for r in range(N_REPLICATIONS):
+                # Only the row IDs and seeds differ between replications
+                if 'ID' in col_pos:
+                    settings_columns['ID'] = np.arange(r * num_base_runs, (r + 1) * num_base_runs)
+                for col in available_seed_cols:
+                    settings_columns[col] = np.full(num_base_runs, r)
+
+                # Columns are already typed, no inference needed
+                chunk_df = pd.DataFrame(settings_columns, columns=columns, copy=False)
+                table = pa.Table.from_pandas(chunk_df, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(SA_SETTINGS_FILE, table.schema, compression='zstd')
+                writer.write_table(table)
+
+                if preview_rows < XLSX_PREVIEW_ROWS:
+                    preview_parts.append(chunk_df.head(XLSX_PREVIEW_ROWS - preview_rows))
+                    preview_rows += len(preview_parts[-1])
+
+                map_columns = {'Run_id': run_ids, 'Replication_Seed': np.full(num_base_runs, r)}
+                map_columns.update((name, settings_columns[name]) for name in sa_cols)
+                pd.DataFrame(map_columns, copy=False).to_csv(
+                    SA_MAP_FILE, mode='w' if r == 0 else 'a', header=(r == 0), index=False)
+        finally:
+            if writer is not None:
+                writer.close()
         print(f"\nSuccessfully generated: {SA_SETTINGS_FILE}")
-        sa_map_df.to_csv(SA_MAP_FILE, index=False)
+        if settings.experiments.get('sa_emit_xlsx', False):
+            pd.concat(preview_parts, ignore_index=True).to_excel(SA_SETTINGS_PREVIEW_FILE, index=False)
+            print(f"Successfully generated preview ({preview_rows} rows): {SA_SETTINGS_PREVIEW_FILE}")
         print(f"Successfully generated: {SA_MAP_FILE}")
         
-        print(f"\nTotal scenarios/rows created: {len(sa_settings_df)}")
+        print(f"\nTotal scenarios/rows created: {total_rows}")
         print(f"  ({num_base_runs} base samples x {N_REPLICATIONS} replications)")
 
     except Exception as e:
@@ -17,13 +17,90 @@ and prints the p-values to the console.
  - Ivan Digel <ivan.digel@uni-kassel.de>
 """
 import itertools
-import glob
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-import pickle
+import numpy as np
 from scipy.stats import mannwhitneyu
-from helpers.utils import load_class
+from helpers.utils import load_class, read_last_row
 from helpers.config import settings, get_output_path
 
+# model_df_{files_prefix}_{scenario_id}_{run_id}_{seeds}.pkl
+MODEL_FILE_PATTERN = re.compile(r"^model_df_(.+)_([^_]+)_([^_]+)_[^_]+\.pkl$")
+
+
+def index_model_files(pickle_path):
+    """
+    Lists a pickle folder once and groups its model output pickles.
+
+    Parameters
+    ----------
+    pickle_path : str
+        Path of the pickle folder.
+
+    Returns
+    -------
+    dict
+        Maps (files_prefix, scenario_id, run_id) - all as strings - to the list
+        of matching file paths (one per seed).
+    """
+    grouped = {}
+    if not os.path.isdir(pickle_path):
+        return grouped
+    with os.scandir(pickle_path) as entries:
+        for entry in entries:
+            match = MODEL_FILE_PATTERN.match(entry.name)
+            if match:
+                grouped.setdefault(match.groups(), []).append(entry.path)
+    return grouped
+
+
+def _extract_obstacles(file):
+    """
+    Reads one model output pickle and returns the 'Obstacles' entry of its last time step.
+
+    Top-level function so that it can be mapped over all files by a process pool.
+
+    Parameters
+    ----------
+    file : str
+        Path of the model output pickle.
+
+    Returns
+    -------
+    tuple
+        (obstacles, error) - the obstacles of the last step (or None) and an
+        error message if the file could not be read (else None).
+    """
+    try:
+        last_row = read_last_row(file, ["Obstacles"])
+        if last_row is None:
+            return None, None
+        return last_row["Obstacles"], None
+    except Exception as e:
+        return None, str(e)
+
+
+def _to_padded_array(samples):
+    """
+    Stacks samples of different lengths into one 2D array, padded with NaN.
+
+    Parameters
+    ----------
+    samples : list
+        A list of sample lists.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (len(samples), longest sample), one sample per row.
+    """
+    padded = np.full((len(samples), max(len(sample) for sample in samples)), np.nan)
+    for i, sample in enumerate(samples):
+        padded[i, :len(sample)] = sample
+    return padded
+
 
 def perform_obstacle_significance_test(scenarios: list, 
                                        run_ids: list, 
@@ -69,28 +146,43 @@ def perform_obstacle_significance_test(scenarios: list,
         scenario2_prefix: {}
     }
 
+    # Scenario IDs only depend on the scenario, so the classes are loaded once
+    scenario_ids = {scenario: load_class("Scenario", scenario).id for scenario in scenarios}
+
+    # (files_prefix, file) of every pickle to load
+    load_tasks = []
+    # Pickle folder -> grouped model files, so that each folder is listed only once
+    folder_index = {}
+
     print("--- Searching for pickle files... ---")
     for scenario, run_id, files_prefix in itertools.product(scenarios, run_ids, [scenario1_prefix, scenario2_prefix]):
-        scenario_id = load_class("Scenario", scenario).id
+        scenario_id = scenario_ids[scenario]
         pickle_path = get_output_path(runid=run_id, subfolder='pickles')
+        if pickle_path not in folder_index:
+            folder_index[pickle_path] = index_model_files(pickle_path)
         
-        pattern = f"{pickle_path}/model_df_{files_prefix}_{scenario_id}_{run_id}_*.pkl"
-        model_files = glob.glob(pattern)
+        model_files = folder_index[pickle_path].get((files_prefix, str(scenario_id), str(run_id)), [])
 
         if not model_files:
+            pattern = f"{pickle_path}/model_df_{files_prefix}_{scenario_id}_{run_id}_*.pkl"
             print(f"Warning: No files found for pattern: {pattern}")
             continue
 
         print(f"Found {len(model_files)} seed(s) for prefix '{files_prefix}'")
+        load_tasks.extend((files_prefix, file) for file in model_files)
 
-        for file in model_files:
-            try:
-                df = pd.read_pickle(file)
-                obstacles_for_run = df["Obstacles"].iloc[-1]
+    # Load all files in parallel, then merge the obstacles in the main process
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = executor.map(_extract_obstacles, [file for _, file in load_tasks], chunksize=4)
+        for (files_prefix, file), (obstacles_for_run, error) in zip(load_tasks, results):
+            if error is not None:
+                print(f"Error reading {file}: {error}")
+                continue
 
-                if not isinstance(obstacles_for_run, dict):
-                    continue
+            if not isinstance(obstacles_for_run, dict):
+                continue
 
+            try:
                 for hs_option, obstacles in obstacles_for_run.items():
                     if hs_option not in data_for_test[files_prefix]:
                         data_for_test[files_prefix][hs_option] = {}
@@ -115,11 +207,11 @@ def perform_obstacle_significance_test(scenarios: list,
 
     all_hs_options = set(data_for_test[scenario1_prefix].keys()) | set(data_for_test[scenario2_prefix].keys())
 
+    # Collect all (heating system, obstacle) pairs with samples from both scenarios
+    # and test them in a single vectorized call
+    pairs = []
     for hs_option in sorted(list(all_hs_options)):
-        print(f"\n--- Heating System: {hs_option} ---")
-
         if hs_option not in data_for_test[scenario1_prefix] or hs_option not in data_for_test[scenario2_prefix]:
-            print(f"  Skipping: Data on {hs_option} not available for both scenarios.")
             continue
 
         group1_obstacles = data_for_test[scenario1_prefix][hs_option]
@@ -133,16 +225,42 @@ def perform_obstacle_significance_test(scenarios: list,
             sample2 = group2_obstacles.get(obstacle_key, [])
 
             if not sample1 or not sample2: continue
+            pairs.append((hs_option, obstacle_key, sample1, sample2))
 
-            try:
-                _, p_value = mannwhitneyu(sample1, sample2, alternative='two-sided')
-                # Significance strings without the translation function
-                significance = "Significant" if p_value < 0.05 else "Not Significant"
-                obstacle_name = key_mapping.get(obstacle_key, obstacle_key)
-                print(f"  - Obstacle: {obstacle_name:<12} | p-value: {p_value:.4f} ({significance})")
-            except ValueError:
-                obstacle_name = key_mapping.get(obstacle_key, obstacle_key)
+    p_values = {}
+    if pairs:
+        samples1 = _to_padded_array([pair[2] for pair in pairs])
+        samples2 = _to_padded_array([pair[3] for pair in pairs])
+        try:
+            _, p_array = mannwhitneyu(samples1, samples2, alternative='two-sided', axis=1, nan_policy='omit')
+            p_values = {(hs_option, obstacle_key): p_value
+                        for (hs_option, obstacle_key, _, _), p_value in zip(pairs, np.atleast_1d(p_array))}
+        except ValueError:
+            # Fall back to testing each pair on its own (e.g. identical samples in older SciPy)
+            for hs_option, obstacle_key, sample1, sample2 in pairs:
+                try:
+                    p_values[(hs_option, obstacle_key)] = mannwhitneyu(sample1, sample2, alternative='two-sided')[1]
+                except ValueError:
+                    pass
+
+    for hs_option in sorted(list(all_hs_options)):
+        print(f"\n--- Heating System: {hs_option} ---")
+
+        if hs_option not in data_for_test[scenario1_prefix] or hs_option not in data_for_test[scenario2_prefix]:
+            print(f"  Skipping: Data on {hs_option} not available for both scenarios.")
+            continue
+
+        for pair_hs_option, obstacle_key, _, _ in pairs:
+            if pair_hs_option != hs_option: continue
+
+            obstacle_name = key_mapping.get(obstacle_key, obstacle_key)
+            p_value = p_values.get((hs_option, obstacle_key), np.nan)
+            if np.isnan(p_value):
                 print(f"  - Obstacle: {obstacle_name:<12} | p-value: N/A (samples are identical)")
+                continue
+            # Significance strings without the translation function
+            significance = "Significant" if p_value < 0.05 else "Not Significant"
+            print(f"  - Obstacle: {obstacle_name:<12} | p-value: {p_value:.4f} ({significance})")
                 
 if __name__ == '__main__':
     # --- Configuration ---
@@ -19,13 +19,24 @@ import os
 import sys
 import glob
 import joblib
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Non-interactive backend, safe to use in worker processes
 import matplotlib.pyplot as plt
 import seaborn as sns
 from SALib.sample import saltelli
 from SALib.analyze import sobol
 
+# Adjust path to find the analysis modules
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from analysis.analyse_sa_gp_metamodel_sobol import predict_fp32
+
 # --- CONFIGURATION ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 VARS_FILE = os.path.join(BASE_DIR, 'sa_variables.csv')
@@ -39,7 +50,9 @@ CMAP = "viridis"     # Color scheme
 
 # Analysis Settings
 SOBOL_N = 4096       # Samples for heatmap generation (N * (2D + 2))
+SOBOL_N_PROCESSORS = min(8, os.cpu_count() or 1)  # Max. processes per Sobol analysis
 PLOT_POINTS = 100    # Resolution for the single variable line plots
+MAIN_EFFECT_DPI = 100  # Resolution for the single variable PNGs (heatmap stays at 300)
 
 def load_variables():
     """Loads variable names and bounds from CSV."""
@@ -52,35 +65,38 @@ def load_variables():
     bounds = df[['min', 'max']].values.tolist()
     return names, bounds, df
 
-def normalize_matrix(X, bounds):
+def get_scaling(bounds):
+    """Returns the lower bounds and ranges used to normalize inputs."""
+    bounds_arr = np.asarray(bounds, dtype=float)
+    lower = bounds_arr[:, 0]
+    scale = bounds_arr[:, 1] - lower
+    return lower, scale
+
+def normalize_matrix(X, lower, scale):
     """
     Manually normalizes physical inputs to [0, 1] range.
     The GPs were trained on MinMaxScaled data.
     """
-    X_norm = np.zeros_like(X)
-    for i, (lower, upper) in enumerate(bounds):
-        X_norm[:, i] = (X[:, i] - lower) / (upper - lower)
-    return X_norm
+    return (X - lower) / scale
 
-def generate_heatmap(gp_model, problem, model_name, save_dir):
+def generate_heatmap(gp_model, problem, X_norm, model_name, save_dir, n_processors=1):
     """
-    Generates synthetic data, runs Sobol Analysis, and plots S2 Interaction Matrix.
+    Predicts the normalized Saltelli samples, runs Sobol Analysis, and plots S2 Interaction Matrix.
+    X_norm is shared by all models, as the samples depend only on the problem.
+    The mean is predicted in float32 with `predict_fp32`, as for the Sobol
+    indices of the metamodel script. With n_processors > 1 the Sobol Analysis
+    runs in parallel.
     """
     print(f"  > Calculating Interactions (S2)...")
     
-    # 1. Generate Samples (Physical Units)
-    X_phys = saltelli.sample(problem, SOBOL_N, calc_second_order=True)
-    
-    # 2. Normalize for GP Prediction [0, 1]
-    X_norm = normalize_matrix(X_phys, problem['bounds'])
-    
-    # 3. Predict
-    y_pred = gp_model.predict(X_norm, return_std=False)
+    # 1. Predict
+    y_pred = predict_fp32(gp_model, X_norm)
     
-    # 4. Analyze
-    Si = sobol.analyze(problem, y_pred, calc_second_order=True, print_to_console=False)
+    # 2. Analyze
+    Si = sobol.analyze(problem, y_pred, calc_second_order=True, print_to_console=False,
+                       parallel=n_processors > 1, n_processors=n_processors)
     
-    # 5. Extract S2 Matrix
+    # 3. Extract S2 Matrix
     # SALib puts interactions in the upper triangle. The diagonal is NaN.
     s2_matrix = pd.DataFrame(Si['S2'], index=problem['names'], columns=problem['names'])
     
@@ -89,7 +105,7 @@ def generate_heatmap(gp_model, problem, model_name, save_dir):
     max_val = np.nanmax(s2_matrix.values)
     print(f"    Max Interaction found: {max_val:.4f}") 
 
-    # 6. Plotting
+    # 4. Plotting
     plt.figure(figsize=(10, 8))
     
     # --- FIX IS HERE ---
@@ -127,47 +143,91 @@ def generate_main_effects(gp_model, names, bounds, model_name, save_dir):
         
     # Create a base vector of Means (fix all variables to their average)
     means = np.mean(bounds, axis=1)
+    lower, scale = get_scaling(bounds)
+    n_vars = len(names)
+    
+    # Prepare the grids for all variables in one block
+    # Rows i*PLOT_POINTS..(i+1)*PLOT_POINTS vary variable i, the rest stay at the mean
+    bounds_arr = np.asarray(bounds, dtype=float)
+    linspaces = np.linspace(bounds_arr[:, 0], bounds_arr[:, 1], PLOT_POINTS, axis=1)
+    X_grid_phys = np.tile(means, (n_vars * PLOT_POINTS, 1))
+    rows = np.arange(n_vars * PLOT_POINTS)
+    X_grid_phys[rows, rows // PLOT_POINTS] = linspaces.ravel()
+    
+    # Normalize and predict with Uncertainty (Standard Deviation) in a single call.
+    # The grid is small, so it stays in float64 like the standard deviation.
+    X_grid_norm = normalize_matrix(X_grid_phys, lower, scale)
+    y_means, y_stds = gp_model.predict(X_grid_norm, return_std=True)
+    y_means = y_means.reshape(n_vars, PLOT_POINTS)
+    y_stds = y_stds.reshape(n_vars, PLOT_POINTS)
+    
+    # One figure is reused for all variables and cleared between plots
+    fig = plt.figure(figsize=(7, 5), constrained_layout=True)
     
     for i, var_name in enumerate(names):
-        # Prepare the grid for this specific variable
-        # Row = sample, Col = variable
-        X_grid_phys = np.tile(means, (PLOT_POINTS, 1))
-        
-        # Vary the current variable from Min to Max
-        var_min, var_max = bounds[i]
-        linspace = np.linspace(var_min, var_max, PLOT_POINTS)
-        X_grid_phys[:, i] = linspace
-        
-        # Normalize
-        X_grid_norm = normalize_matrix(X_grid_phys, bounds)
-        
-        # Predict with Uncertainty (Standard Deviation)
-        y_mean, y_std = gp_model.predict(X_grid_norm, return_std=True)
+        linspace = linspaces[i]
+        y_mean = y_means[i]
+        y_std = y_stds[i]
         
         # Plot
-        plt.figure(figsize=(7, 5))
+        fig.clf()
+        ax = fig.add_subplot()
         
         # Plot Mean Response
-        plt.plot(linspace, y_mean, label='Mean Prediction', color='#2c3e50', linewidth=2)
+        ax.plot(linspace, y_mean, label='Mean Prediction', color='#2c3e50', linewidth=2,
+                rasterized=True)
         
         # Plot Confidence Interval (95% -> 1.96 std)
-        plt.fill_between(linspace, 
-                         y_mean - 1.96 * y_std, 
-                         y_mean + 1.96 * y_std, 
-                         alpha=0.2, 
-                         color='#2c3e50',
-                         label='95% Confidence')
+        ax.fill_between(linspace, 
+                        y_mean - 1.96 * y_std, 
+                        y_mean + 1.96 * y_std, 
+                        alpha=0.2, 
+                        color='#2c3e50',
+                        label='95% Confidence',
+                        rasterized=True)
         
-        plt.xlabel(f"{var_name} (Input Value)")
-        plt.ylabel("Model Output")
-        plt.title(f"Main Effect: {var_name}\n(Output: {model_name})")
-        plt.grid(True, linestyle='--', alpha=0.6)
-        plt.legend()
+        ax.set_xlabel(f"{var_name} (Input Value)")
+        ax.set_ylabel("Model Output")
+        ax.set_title(f"Main Effect: {var_name}\n(Output: {model_name})")
+        ax.grid(True, linestyle='--', alpha=0.6)
+        ax.legend()
         
         # Save individual plot
         safe_var_name = var_name.replace("/", "_").replace(" ", "_")
-        plt.savefig(os.path.join(plots_dir, f"{safe_var_name}.png"), dpi=150)
-        plt.close()
+        fig.savefig(os.path.join(plots_dir, f"{safe_var_name}.png"), dpi=MAIN_EFFECT_DPI)
+    
+    plt.close(fig)
+
+def process_model(model_path, problem, X_norm, names, bounds, n_processors=1):
+    """
+    Loads one trained GP and writes its heatmap and main effect plots.
+    Runs in a worker process, so errors are reported here instead of raised.
+    """
+    try:
+        # Extract clean name from filename
+        # e.g., "gp_Scenario_fulfilment.pkl" -> "Scenario_fulfilment"
+        filename = os.path.basename(model_path)
+        model_name = filename.replace("gp_", "").replace(".pkl", "")
+        
+        print(f"\nProcessing: {model_name}")
+        
+        # Create subfolder for this output
+        model_output_dir = os.path.join(OUTPUT_DIR, model_name)
+        os.makedirs(model_output_dir, exist_ok=True)
+        
+        # Load the GP
+        gp = joblib.load(model_path)
+        
+        # TASK A: Heatmap
+        generate_heatmap(gp, problem, X_norm, model_name, model_output_dir, n_processors)
+        
+        # TASK B: Single Plots
+        generate_main_effects(gp, names, bounds, model_name, model_output_dir)
+        
+    except Exception as e:
+        print(f"Error processing {model_path}: {e}")
+        import traceback
+        traceback.print_exc()
 
 def main():
     # 1. Setup
@@ -182,6 +242,7 @@ def main():
         'names': names,
         'bounds': bounds
     }
+    problem['lower'], problem['scale'] = get_scaling(bounds)
     
     # 3. Find Models
     model_pattern = os.path.join(MODEL_DIR, "gp_*.pkl")
@@ -193,34 +254,19 @@ def main():
 
     print(f"Found {len(model_files)} trained models.")
 
-    # 4. Iterate Models
-    for model_path in model_files:
-        try:
-            # Extract clean name from filename
-            # e.g., "gp_Scenario_fulfilment.pkl" -> "Scenario_fulfilment"
-            filename = os.path.basename(model_path)
-            model_name = filename.replace("gp_", "").replace(".pkl", "")
-            
-            print(f"\nProcessing: {model_name}")
-            
-            # Create subfolder for this output
-            model_output_dir = os.path.join(OUTPUT_DIR, model_name)
-            if not os.path.exists(model_output_dir):
-                os.makedirs(model_output_dir)
-            
-            # Load the GP
-            gp = joblib.load(model_path)
-            
-            # TASK A: Heatmap
-            generate_heatmap(gp, problem, model_name, model_output_dir)
-            
-            # TASK B: Single Plots
-            generate_main_effects(gp, names, bounds, model_name, model_output_dir)
-            
-        except Exception as e:
-            print(f"Error processing {model_path}: {e}")
-            import traceback
-            traceback.print_exc()
+    # Generate Saltelli Samples (Physical Units) once and normalize for GP Prediction [0, 1]
+    X_phys = saltelli.sample(problem, SOBOL_N, calc_second_order=True)
+    X_norm = normalize_matrix(X_phys, problem['lower'], problem['scale']).astype(np.float32)
+
+    # 4. Process Models in parallel, one worker per model
+    n_workers = min(len(model_files), os.cpu_count() or 1)
+    n_models = len(model_files)
+    # Share the remaining cores between the workers' Sobol analyses
+    n_processors = max(1, min(SOBOL_N_PROCESSORS, (os.cpu_count() or 1) // n_workers))
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        list(executor.map(process_model, model_files, [problem] * n_models,
+                          [X_norm] * n_models, [names] * n_models, [bounds] * n_models,
+                          [n_processors] * n_models))
 
     print(f"\n--- Done! Results saved to: {OUTPUT_DIR} ---")
 
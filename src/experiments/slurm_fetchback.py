@@ -14,6 +14,8 @@ Fetch result data back from cluster to local hard drive.
 
 import os
 import logging
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 from helpers.config import (
     settings, load_config_for_id, config_logging, 
@@ -27,7 +29,10 @@ logger = logging.getLogger("ahoi.cluster.batchscript")
 
 def fetch_outputfiles_from_cluster(run_id: int = None):
     """
-    Fetch output files from cluster via SCP
+    Fetch output files from cluster via rsync
+
+    Only files that changed since the last fetch are transferred, and data
+    is compressed in transit.
 
     Other Parameters
     ----------------
@@ -46,23 +51,45 @@ def fetch_outputfiles_from_cluster(run_id: int = None):
         f"Fetch pickle files from cluster for runID {run_id}..."
     )
     
-    scpstatement = (
-        "scp -r "
-        + settings.slurm.username
+    local_path = get_output_path(runid=run_id, subfolder=os.path.dirname(settings.slurm.fetch_pattern))
+    os.makedirs(local_path, exist_ok=True)
+    rsyncstatement = [
+        "rsync", "-aHz",
+        settings.slurm.username
         + "@"
         + settings.slurm.host
         + ":"
         + get_cluster_output_path(runid=run_id)
         + "/"
-        + settings.slurm.fetch_pattern
-        + " "
-        + get_output_path(runid=run_id, subfolder=os.path.dirname(settings.slurm.fetch_pattern))
-    )
-    logger.debug(scpstatement)
-    os.system(scpstatement)
+        + settings.slurm.fetch_pattern,
+        local_path + "/",
+    ]
+    logger.debug(" ".join(rsyncstatement))
+    result = subprocess.run(rsyncstatement)
+    if result.returncode != 0:
+        logger.warning(f"Fetching runID {run_id} failed (rsync exit code {result.returncode})")
+    return result.returncode
+
+
+def fetch_runs_from_cluster(run_ids):
+    """
+    Fetch output files for several run IDs concurrently
+
+    Parameters
+    ----------
+    run_ids : iterable of int
+        Run IDs to fetch
+
+    Other Parameters
+    ----------------
+
+    - settings.slurm.fetch_workers
+    """
+    with ThreadPoolExecutor(max_workers=settings.slurm.get("fetch_workers", 8)) as executor:
+        return list(executor.map(fetch_outputfiles_from_cluster, run_ids))
+
             
 if __name__ == "__main__":
     logging.basicConfig(level=logging.DEBUG)
-    for run_id in range(settings.slurm.fetch_runid_start, settings.slurm.fetch_runid_end + 1):
-        fetch_outputfiles_from_cluster(run_id = run_id)
+    fetch_runs_from_cluster(range(settings.slurm.fetch_runid_start, settings.slurm.fetch_runid_end + 1))
 
@@ -14,7 +14,10 @@ transfer these scripts to the cluster and optionally execute them.
 """
 
 import os
+import atexit
 import logging
+import subprocess
+import tarfile
 
 from helpers.config import (
     settings, load_config_for_id, config_logging, 
@@ -25,53 +28,108 @@ from experiments.slurm_script_generation import generate_script
 
 logger = logging.getLogger("ahoi.cluster.batchscript")
 
+# Socket of the shared SSH connection (%r: remote user, %h: host, %p: port)
+SSH_CONTROL_PATH = "/tmp/ahoi-cm-%r@%h:%p"
+
+
+def _remote_login():
+    return settings.slurm.username + "@" + settings.slurm.host
+
+
+def _ssh(remote_command):
+    """
+    Build an ssh call that reuses the shared connection if it is open
+
+    Parameters
+    ----------
+    remote_command: str
+        command to execute on the cluster
+    """
+    return ["ssh", "-o", "ControlPath=" + SSH_CONTROL_PATH, _remote_login(), remote_command]
+
+
+def _scp(sources, remote_path):
+    """
+    Build an scp call that reuses the shared connection if it is open
+
+    Parameters
+    ----------
+    sources: list[str]
+        local files to transfer
+    remote_path: str
+        target path on the cluster
+    """
+    return (
+        ["scp", "-o", "ControlPath=" + SSH_CONTROL_PATH]
+        + list(sources)
+        + [_remote_login() + ":" + remote_path]
+    )
+
+
+def _run(command):
+    logger.debug("Statement: " + " ".join(command))
+    subprocess.run(command, check=True)
+
+
+def open_ssh_master():
+    """
+    Open one SSH master connection which all following ssh/scp calls attach to,
+    so that only a single handshake is needed. The connection is closed at exit.
+    If it cannot be opened, the calls simply connect on their own.
+    """
+    result = subprocess.run(
+        ["ssh", "-M", "-S", SSH_CONTROL_PATH, "-o", "ControlPersist=60s", "-fN", _remote_login()]
+    )
+    if result.returncode == 0:
+        atexit.register(close_ssh_master)
+    else:
+        logger.warning("Could not open shared SSH connection, connecting per call.")
+
+
+def close_ssh_master():
+    """
+    Close the SSH master connection opened by open_ssh_master
+    """
+    subprocess.run(["ssh", "-S", SSH_CONTROL_PATH, "-O", "exit", _remote_login()])
+
 
 def transferSlurmFiles(maxRunId):
     """
-    Transfer files to cluster via SCP
+    Transfer files to cluster as one tar stream over a single SSH call
+
+    The archive is piped directly into 'tar -x' on the cluster, so no
+    temporary archive is written on either side.
 
     Parameters
     ----------
     maxRunID: int
         maximum run ID of this job set
     """
-    sshstransfer = (
-        "ssh "
-        + settings.slurm.username
-        + "@"
-        + settings.slurm.host
-        + " \"mkdir -p "
-        + get_cluster_output_path(
-            runid=maxRunId, subfolder=settings.slurm.target_execfile
-        )
-        +"\""
-    )
-
-    if settings.slurm.transferSlurmFile:
-        logger.info("Create directories for slurm files...")
-        logger.debug("Statement: " + sshstransfer)
-        os.system(sshstransfer)
+    if not settings.slurm.transferSlurmFile:
+        return
 
-    localTargetDirExecfile = os.path.join(
+    clusterTargetDirExecfile = get_cluster_output_path(
+        runid=maxRunId, subfolder=settings.slurm.target_execfile
+    )
+    localTargetDirExecfile = os.path.expanduser(
         get_output_path(runid=maxRunId, subfolder=settings.slurm.target_execfile)
     )
-    scpstatement = (
-        "scp -r "
-        + os.path.expanduser(localTargetDirExecfile)
-        + "/* "
-        + settings.slurm.username
-        + "@"
-        + settings.slurm.host
-        + ":\""
-        + get_cluster_output_path(
-            runid=maxRunId, subfolder=settings.slurm.target_execfile
-            )
-        + "\""
+
+    logger.info("Create directories for slurm files and transfer slurm files...")
+    command = _ssh(
+        "mkdir -p " + clusterTargetDirExecfile
+        + " && tar -xzf - -C " + clusterTargetDirExecfile
     )
-    logger.debug(scpstatement)
-    if settings.slurm.transferSlurmFile:
-        logger.debug("Transfer slurm files...")
-        os.system(scpstatement)
+    logger.debug("Statement: " + " ".join(command))
+    proc = subprocess.Popen(command, stdin=subprocess.PIPE)
+    try:
+        with tarfile.open(fileobj=proc.stdin, mode="w|gz") as tar:
+            tar.add(localTargetDirExecfile, arcname=".")
+    finally:
+        proc.stdin.close()
+        returncode = proc.wait()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command)
 
 
 def transferSettingsFile():
@@ -82,24 +140,13 @@ def transferSettingsFile():
     if not settings_filename:
         # if variable is not set, settings_filename will be None
         settings_filename = "settings_local_cluster.toml"
-    scpsettings = (
-        "scp "
-        + os.path.dirname(os.path.realpath(__file__))
-        + "/../settings/"
-        + settings_filename
-        + " "
-        + settings.slurm.username
-        + "@"
-        + settings.slurm.host
-        + ":\""
-        + settings.slurm.target_cluster_modelbase
-        + "/settings/settings_local.toml"
-        + "\""
+    scpsettings = _scp(
+        [os.path.dirname(os.path.realpath(__file__)) + "/../settings/" + settings_filename],
+        settings.slurm.target_cluster_modelbase + "/settings/settings_local.toml",
     )
-    logger.debug(scpsettings)
     if settings.slurm.transferSettingsFile:
         logger.info("Transfer settings file...")
-        os.system(scpsettings)
+        _run(scpsettings)
 
 
 def transferScenarioFile():
@@ -107,39 +154,22 @@ def transferScenarioFile():
     Transfer Scenario Config Excel File
     """
 
-    sshCreateFolder = (
-        "ssh "
-        + settings.slurm.username
-        + "@"
-        + settings.slurm.host
-        + " \"mkdir -p "
+    sshCreateFolder = _ssh(
+        "mkdir -p "
         + settings.slurm.target_cluster_modelbase
         + os.path.dirname(settings.main.excel_scenario_file)
-        + "\""
     )
-    logger.debug(sshCreateFolder)
     if settings.slurm.transferScenarioExcelFile:
         logger.info("Create directories...")
-        os.system(sshCreateFolder)
-
-    scpsTransferFile = (
-        "scp "
-        + os.path.dirname(os.path.realpath(__file__))
-        + "/../"
-        + settings.main.excel_scenario_file
-        + " "
-        + settings.slurm.username
-        + "@"
-        + settings.slurm.host
-        + ":\""
-        + settings.slurm.target_cluster_modelbase
-        + settings.main.excel_scenario_file
-        + "\""
+        _run(sshCreateFolder)
+
+    scpsTransferFile = _scp(
+        [os.path.dirname(os.path.realpath(__file__)) + "/../" + settings.main.excel_scenario_file],
+        settings.slurm.target_cluster_modelbase + settings.main.excel_scenario_file,
     )
-    logger.debug(scpsTransferFile)
     if settings.slurm.transferScenarioExcelFile:
         logger.info("Transfer scenario file...")
-        os.system(scpsTransferFile)
+        _run(scpsTransferFile)
 
 
 def executeSlurmScript(execScriptFilename, maxRunId):
@@ -162,13 +192,8 @@ def executeSlurmScript(execScriptFilename, maxRunId):
         + execScriptFilename
     )
 
-    sshstatement = (
-        "ssh "
-        + settings.slurm.username
-        + "@"
-        + settings.slurm.host
-        + " "
-        + "\"bash -l -c 'cd "
+    sshstatement = _ssh(
+        "bash -l -c 'cd "
         + get_cluster_output_path(
             runid=maxRunId, subfolder=settings.slurm.target_execfile
         )
@@ -177,13 +202,11 @@ def executeSlurmScript(execScriptFilename, maxRunId):
         + scriptfile
         + "; "
         + scriptfile
-        +"'\""
+        + "'"
     )
-    logger.debug(sshstatement)
     if settings.slurm.executeSLURMscripts:
         logger.info("Execute slurm script on cluster (max runID: %d)...", maxRunId)
-        logger.debug(sshstatement)
-        os.system(sshstatement)
+        _run(sshstatement)
 
 
 
@@ -222,6 +245,9 @@ def generateAndTransfer():
     logger.info(f"Using dynamically loaded base run_id: {base_run_id} for all operations.")
 
     execScriptFilename = generate_script()
+    if (settings.slurm.transferSlurmFile or settings.slurm.transferSettingsFile
+            or settings.slurm.transferScenarioExcelFile or settings.slurm.executeSLURMscripts):
+        open_ssh_master()
     transferSlurmFiles(base_run_id)
     transferSettingsFile()
     transferScenarioFile()
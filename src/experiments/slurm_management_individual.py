@@ -19,17 +19,27 @@ Different version of slurm_management.py for 'individual_runs'.
 
 import os
 import logging
+import posixpath
+import shlex
 import subprocess
 import sys
 import shutil
 import tarfile
 import tempfile
-import textwrap
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+try:
+    import zstandard
+    use_zstd = True
+except ImportError:
+    use_zstd = False
 
 from helpers.config import (
     settings, load_config_for_id, 
     get_output_path,
-    get_cluster_output_path
+    get_cluster_output_path,
+    get_linux_cluster_output_path,
+    sanitize_path_for_linux
 )
 from experiments.slurm_script_generation import generate_script
 
@@ -37,28 +47,48 @@ from experiments.slurm_script_generation import generate_script
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s', datefmt='%H:%M:%S')
 logger = logging.getLogger("ahoi.cluster.optimized")
 
-def sanitize_path_for_linux(path_str):
-    """Ensures paths work on Linux (forward slashes, $HOME)."""
-    clean = path_str.replace("\\", "/")
-    if clean.startswith("~"):
-        clean = clean.replace("~", "${HOME}", 1)
-    return clean
+# Number of wrapper scripts run in parallel on the login node by the master script
+SUBMIT_PARALLELISM = 16
 
-def transfer_packed_tarball(run_ids, staging_root):
+def quote_remote_path(path_str):
+    """Quotes a path for the remote shell, keeping a leading ~ or ${HOME} expandable."""
+    for prefix in ("~/", "${HOME}/"):
+        if path_str.startswith(prefix):
+            return prefix + shlex.quote(path_str[len(prefix):])
+    return shlex.quote(path_str)
+
+def _link_or_copy(src, dst):
     """
-    Tars the local staging directory, transfers it ONCE, and extracts it on the cluster.
+    Hardlinks src to dst so staging does not duplicate file contents.
+    Falls back to a copy, e.g. across filesystems or if dst already exists.
     """
-    logger.info(f"Packing {len(run_ids)} run configurations into a single archive...")
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+    return dst
+
+def remote_has_zstd():
+    """
+    Checks whether the zstd command is available on the cluster.
+    """
+    command = ["ssh", f"{settings.slurm.username}@{settings.slurm.host}", "bash -l -c 'command -v zstd'"]
+    result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return result.returncode == 0
 
-    # 1. Create Tarball locally
-    tar_filename = "payload_slurm.tar.gz"
-    tar_path = os.path.join(staging_root, tar_filename)
-    
-    with tarfile.open(tar_path, "w:gz") as tar:
-        # We add the CONTENTS of staging_root, not the root itself
-        tar.add(staging_root, arcname=".", filter=lambda x: None if x.name.endswith(tar_filename) else x)
+def transfer_packed_tarball(run_ids, staging_root):
+    """
+    Tars the local staging directory and streams it ONCE over ssh into tar on the cluster.
+    No archive file is written locally or remotely.
+    The stream is zstd-compressed if settings.slurm.transfer_compression is "zstd",
+    the zstandard package is installed and zstd is found on the cluster,
+    gzip otherwise.
+    """
+    logger.info(f"Packing {len(run_ids)} run configurations into a single archive stream...")
 
-    # 2. Determine Remote Destination (The Task Root)
+    # 1. Determine Remote Destination (The Task Root)
     # We need the parent of the run folders. 
     sample_run_id = run_ids[0]
     # Get the path to the execfile folder on cluster (e.g. .../task/run_id/slurm)
@@ -71,37 +101,41 @@ def transfer_packed_tarball(run_ids, staging_root):
     remote_task_root = os.path.dirname(remote_run_root)
     
     remote_task_root = sanitize_path_for_linux(remote_task_root)
-    remote_tar_dest = f"/tmp/{tar_filename}"
 
-    # 3. SCP the Tarball (1 Connection)
-    logger.info(f"Transferring archive ({os.path.getsize(tar_path)/1024:.1f} KB) to {remote_task_root}...")
-    
+    # 2. Stream the Tarball into the remote tar (1 Connection)
+    compress_zstd = use_zstd and settings.slurm.get("transfer_compression", "gzip") == "zstd"
+    if compress_zstd and not remote_has_zstd():
+        logger.warning("zstd not found on the cluster. Falling back to gzip.")
+        compress_zstd = False
+    extract = "zstd -dc | tar -xf -" if compress_zstd else "tar -xzf -"
     # Ensure remote task root exists before extracting
-    subprocess.run(
-        ["ssh", f"{settings.slurm.username}@{settings.slurm.host}", f"mkdir -p {remote_task_root}"],
-        check=True
-    )
-
-    subprocess.run(
-        ["scp", tar_path, f"{settings.slurm.username}@{settings.slurm.host}:{remote_tar_dest}"],
-        check=True
-    )
-
-    # 4. SSH to Extract (1 Connection)
-    cmd = (
-        f"tar -xzf {remote_tar_dest} -C {remote_task_root} && "
-        f"rm {remote_tar_dest}"
-    )
-    
-    logger.info(f"Extracting archive on cluster...")
-    subprocess.run(
-        ["ssh", f"{settings.slurm.username}@{settings.slurm.host}", f"bash -l -c '{cmd}'"],
-        check=True
-    )
+    quoted_root = quote_remote_path(remote_task_root)
+    cmd = f"mkdir -p {quoted_root} && {extract} -C {quoted_root}"
+    logger.info(f"Transferring and extracting archive to {remote_task_root}...")
+    # cmd holds quotes itself, so it is quoted as a whole for the remote login shell
+    command = ["ssh", f"{settings.slurm.username}@{settings.slurm.host}", f"bash -l -c {shlex.quote(cmd)}"]
+    proc = subprocess.Popen(command, stdin=subprocess.PIPE)
+    try:
+        if compress_zstd:
+            # Multi-threaded zstd is much faster than Python's single-threaded gzip
+            cctx = zstandard.ZstdCompressor(level=3, threads=-1)
+            with cctx.stream_writer(proc.stdin) as zw, tarfile.open(fileobj=zw, mode="w|") as tar:
+                # We add the CONTENTS of staging_root, not the root itself
+                tar.add(staging_root, arcname=".")
+        else:
+            with tarfile.open(fileobj=proc.stdin, mode="w|gz") as tar:
+                # We add the CONTENTS of staging_root, not the root itself
+                tar.add(staging_root, arcname=".")
+    finally:
+        proc.stdin.close()
+        returncode = proc.wait()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command)
 
 def execute_via_meta_script(script_details):
     """
     Generates one master bash script to submit all jobs locally on the cluster.
+    The wrappers are run SUBMIT_PARALLELISM at a time through a single xargs -P call.
     """
     logger.info(f"Generating master execution script for {len(script_details)} jobs...")
     
@@ -111,24 +145,27 @@ def execute_via_meta_script(script_details):
         ""
     ]
 
-    for filename, run_id in script_details:
-        # Resolve paths
-        raw_path = get_cluster_output_path(runid=run_id, subfolder=settings.slurm.target_execfile)
-        target_dir = sanitize_path_for_linux(raw_path)
-        script_path = f"{target_dir}/{filename}"
-
-        lines.append(textwrap.dedent(f"""
-            # --- Run {run_id} ---
-            if [ -f "{script_path}" ]; then
-                cd "{target_dir}"
-                dos2unix "{filename}" > /dev/null 2>&1
-                chmod u+x "{filename}"
-                # Execute the wrapper, which will submit the sbatch files
-                bash "{filename}"
-            else
-                echo "ERROR: Script not found: {script_path}"
-            fi
-        """))
+    # Resolve paths, quoted for the remote shell (only a leading ${HOME} stays expandable)
+    script_paths = [
+        quote_remote_path(f"{get_linux_cluster_output_path(runid=run_id, subfolder=settings.slurm.target_execfile)}/{filename}")
+        for filename, run_id in script_details
+    ]
+
+    # Pre-validation sweep: report missing wrappers (they are skipped below)
+    for script_path in script_paths:
+        lines.append(f'[ -f {script_path} ] || echo "ERROR: Script not found: "{script_path}')
+
+    # Execute the wrappers, which will submit the sbatch files, in parallel.
+    # printf emits one NUL-terminated record per wrapper; each task splits its
+    # record into directory and file name itself.
+    lines.append("printf '%s\\0' \\")
+    lines.extend(f"    {script_path} \\" for script_path in script_paths)
+    lines.append(
+        f"| xargs -0 -n 1 -P {SUBMIT_PARALLELISM} sh -c '"
+        'cd "${1%/*}" 2> /dev/null || exit 0; f="${1##*/}"; [ -f "$f" ] || exit 0; '
+        'dos2unix "$f" > /dev/null 2>&1; chmod u+x "$f"; bash "$f"'
+        "' sh"
+    )
     
     lines.append("echo 'All jobs submitted.'")
     
@@ -159,22 +196,53 @@ def transferSettingsFile():
     local_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "../settings/", settings_filename)
     remote_path = f"{settings.slurm.target_cluster_modelbase}/settings/settings_local.toml"
     
-    cmd = f"scp {local_path} {settings.slurm.username}@{settings.slurm.host}:\"{remote_path}\""
+    cmd = ["scp", local_path, f"{settings.slurm.username}@{settings.slurm.host}:{remote_path}"]
     if settings.slurm.transferSettingsFile:
         logger.info("Transferring settings file...")
-        os.system(cmd)
+        subprocess.run(cmd, check=True)
 
 def transferScenarioFile():
     local_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "../", settings.main.excel_scenario_file)
     remote_path = f"{settings.slurm.target_cluster_modelbase}{settings.main.excel_scenario_file}"
     
-    dir_cmd = f"ssh {settings.slurm.username}@{settings.slurm.host} \"mkdir -p $(dirname {remote_path})\""
-    os.system(dir_cmd)
-    
-    scp_cmd = f"scp {local_path} {settings.slurm.username}@{settings.slurm.host}:\"{remote_path}\""
     if settings.slurm.transferScenarioExcelFile:
+        dir_cmd = [
+            "ssh", f"{settings.slurm.username}@{settings.slurm.host}",
+            f"mkdir -p {quote_remote_path(posixpath.dirname(remote_path))}"
+        ]
+        subprocess.run(dir_cmd, check=True)
+
+        scp_cmd = ["scp", local_path, f"{settings.slurm.username}@{settings.slurm.host}:{remote_path}"]
         logger.info("Transferring scenario file...")
-        os.system(scp_cmd)
+        subprocess.run(scp_cmd, check=True)
+
+def _init_generation_worker():
+    """
+    Silences the config loading logs ('ahoi') once per worker process, while the
+    script generation logs ('ahoi.cluster') stay at INFO.
+    """
+    logging.getLogger("ahoi").setLevel(logging.WARNING)
+    logging.getLogger("ahoi.cluster").setLevel(logging.INFO)
+
+def _generate_one(config_id):
+    """
+    Loads the config and generates its scripts (Wrapper + Batchfiles).
+    Runs in a worker process; each process has its own settings object.
+    Returns (execScriptFilename, run_id, local wrapper path, local batchfiles folder),
+    as the local paths depend on the loaded config.
+    """
+    load_config_for_id(config_id)
+    
+    current_run_id = settings.main.run_id
+    
+    # execScriptFilename is usually 'run_simulation.sh'
+    execScriptFilename = generate_script(
+        args=["-s", str(config_id), "-e", str(config_id), "-n", str(current_run_id)]
+    )
+    real_local_exec_dir = get_output_path(runid=current_run_id, subfolder=settings.slurm.target_execfile)
+    real_exec_path = os.path.join(real_local_exec_dir, execScriptFilename)
+    real_local_batch_dir = get_output_path(runid=current_run_id, subfolder=settings.slurm.target_batchfiles)
+    return execScriptFilename, current_run_id, real_exec_path, real_local_batch_dir
 
 def generateAndTransferOptimized():
     logger.info("Starting OPTIMIZED Generate and Transfer...")
@@ -189,57 +257,63 @@ def generateAndTransferOptimized():
     script_details = [] 
     run_ids_processed = []
 
-    with tempfile.TemporaryDirectory() as staging_dir:
+    with ThreadPoolExecutor(max_workers=2) as transfer_executor, \
+            tempfile.TemporaryDirectory() as staging_dir:
+        # The shared files do not depend on the generated scripts, so they are
+        # transferred in the background while the scripts are generated
+        shared_transfers = [
+            transfer_executor.submit(transferSettingsFile),
+            transfer_executor.submit(transferScenarioFile),
+        ]
+
         logger.info(f"Created temporary staging area: {staging_dir}")
         logger.info(f"Step 1: Generating and Staging scripts ({start_id}-{end_id})...")
         
-        for i, config_id in enumerate(range(start_id, end_id + 1)):
-            sys.stdout.write(f"\rProcessing: {i+1}/{end_id-start_id+1}")
-            sys.stdout.flush()
-
-            logging.getLogger("ahoi").setLevel(logging.WARNING)
-            load_config_for_id(config_id)
-            logging.getLogger("ahoi").setLevel(logging.INFO)
-            
-            current_run_id = settings.main.run_id
-            
-            # 1. Generate the files (Wrapper + Batchfiles)
-            # execScriptFilename is usually 'run_simulation.sh'
-            execScriptFilename = generate_script(
-                args=["-s", str(config_id), "-e", str(config_id), "-n", str(current_run_id)]
-            )
-            
+        # 1. Generate the files (Wrapper + Batchfiles) in parallel, one config per task
+        generated = []
+        total = end_id - start_id + 1
+        with ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_init_generation_worker) as executor:
+            for i, result in enumerate(executor.map(_generate_one, range(start_id, end_id + 1))):
+                # Update the progress line only every 64 configs (and at the end)
+                if (i & 63) == 0 or i + 1 == total:
+                    sys.stdout.write(f"\rProcessing: {i+1}/{total}")
+                    sys.stdout.flush()
+                generated.append(result)
+
+        # 2. Stage the generated files once all of them are written. Configs may
+        # share a run_id, so each run's batchfiles folder is copied only once.
+        staged_batch_dirs = set()
+        for execScriptFilename, current_run_id, real_exec_path, real_local_batch_dir in generated:
             script_details.append((execScriptFilename, current_run_id))
             run_ids_processed.append(current_run_id)
 
             # --- STAGING STRATEGY (UPDATED) ---
             
             # A. Copy the Execution Wrapper (e.g. slurm/run_sim.sh)
-            real_local_exec_dir = get_output_path(runid=current_run_id, subfolder=settings.slurm.target_execfile)
-            real_exec_path = os.path.join(real_local_exec_dir, execScriptFilename)
-            
             staging_exec_path = os.path.join(staging_dir, str(current_run_id), settings.slurm.target_execfile)
             os.makedirs(staging_exec_path, exist_ok=True)
-            shutil.copy2(real_exec_path, staging_exec_path)
+            _link_or_copy(real_exec_path, staging_exec_path)
 
             # B. Copy the Batchfiles Folder (e.g. batchfiles/*.sh)
             # This was missing in the previous version!
-            real_local_batch_dir = get_output_path(runid=current_run_id, subfolder=settings.slurm.target_batchfiles)
-            
             staging_batch_path = os.path.join(staging_dir, str(current_run_id), settings.slurm.target_batchfiles)
             
             # Copy the whole directory (dirs_exist_ok=True allows merging if dirs are same)
+            if current_run_id in staged_batch_dirs:
+                continue
+            staged_batch_dirs.add(current_run_id)
             if os.path.exists(real_local_batch_dir):
-                shutil.copytree(real_local_batch_dir, staging_batch_path, dirs_exist_ok=True)
+                shutil.copytree(real_local_batch_dir, staging_batch_path, dirs_exist_ok=True,
+                                copy_function=_link_or_copy)
             else:
                 logger.warning(f"\nWarning: Batchfile dir not found locally: {real_local_batch_dir}")
 
         print("") # Newline
         logger.info("Generation and Staging complete.")
 
-        logger.info("Step 2: Transferring shared files...")
-        transferSettingsFile()
-        transferScenarioFile()
+        logger.info("Step 2: Waiting for shared file transfers...")
+        for transfer in shared_transfers:
+            transfer.result()
         
         if settings.slurm.transferSlurmFile:
             transfer_packed_tarball(run_ids_processed, staging_dir)
@@ -10,7 +10,8 @@ and subsample sets.
 
 """
 
-import os, stat, sys
+import os, re, stat, sys
+from functools import lru_cache
 from optparse import OptionParser
 import logging
 from helpers.config import (
@@ -31,6 +32,25 @@ defaultNumRunsPerBatch = 1
 default_config_id_start = settings.main.config_id_start
 default_config_id_end = settings.main.config_id_end
 
+PLACEHOLDER_RE = re.compile(
+    r"%(?:PROJECT|TASK|CONFIG_ID_START|CONFIG_ID_END|RUN_ID|PARTITION|DURATION|USERNAME)%"
+)
+# #SBATCH directives setting the log file names (the only ones SLURM expands %a in)
+SBATCH_LOG_RE = re.compile(r"#SBATCH\s+(?:-o|-e|--output|--error)\b")
+
+
+@lru_cache(maxsize=None)
+def _load_template(scriptTemplate):
+    """
+    Reads the SLURM template once per process and normalises line endings
+    (every line ends with \n).
+    """
+    with open(scriptTemplate, "rb") as infile:
+        template = infile.read().decode().replace("\r\n", "\n")
+    if template and not template.endswith("\n"):
+        template += "\n"
+    return template
+
 
 def generate_script(args=sys.argv[1:]):
     """
@@ -157,45 +177,46 @@ def generate_script(args=sys.argv[1:]):
     )
 
     logger.info("Generate SLURM execution script to " + execScriptFilename + "...")
-    execScript = open(execScriptFilename, "w", newline="\n")
-    execScript.write("#!/bin/sh\n")
-
-    for k in range(config_id_start, config_id_end + 1, num_runs_per_batch):
-        logger.debug(
-            "Run "
-            + str(runnumber)
-            + " (ID: "
-            + str(k)
-            + ")"
-        )
-
-        scriptFilename = (
-            targetDirBatchfiles
-            + "/sbatchScript_"
-            + project
-            + "_"
-            + str(k)
-            + ".sh"
-        )
-        script = open(scriptFilename, "w", newline="\n")
-
-        infile = open(scriptTemplate, "r")
-        inputLine = infile.readline()
-        while inputLine != "":
-            inputLine = inputLine.rstrip('\r\n')
-            inputLine = inputLine.replace("%PROJECT%", project)
-            inputLine = inputLine.replace("%TASK%", task)
-            inputLine = inputLine.replace("%CONFIG_ID_START%", str(k))
-            inputLine = inputLine.replace("%CONFIG_ID_END%", str(k + num_runs_per_batch - 1))
-            inputLine = inputLine.replace("%RUN_ID%", str(runnumber))
-            inputLine = inputLine.replace("%PARTITION%", str(partition))
-            inputLine = inputLine.replace("%DURATION%", str(duration))
-            inputLine = inputLine.replace("%USERNAME%", settings.slurm.username)
-            script.write(inputLine + "\n")
-            inputLine = infile.readline()
-        infile.close()
-        script.close()
-        execScript.write(
+    # Collect the execution script and write it in one go at the end
+    execLines = ["#!/bin/sh\n"]
+
+    template = _load_template(scriptTemplate)
+    subs = {
+        "%PROJECT%": project,
+        "%TASK%": task,
+        "%PARTITION%": str(partition),
+        "%DURATION%": str(duration),
+        "%USERNAME%": settings.slurm.username,
+    }
+
+    use_array_job = settings.slurm.get("array_job", False)
+    if use_array_job and settings.output.simplenames:
+        logger.warning("slurm.array_job is ignored with output.simplenames (run ID changes per batch).")
+        use_array_job = False
+
+    if use_array_job:
+        # One SLURM array job for all batches: each task's SLURM_ARRAY_TASK_ID is the
+        # first config ID of its batch (%a in the -o/-e file name patterns)
+        array_range = f"{config_id_start}-{config_id_end}:{num_runs_per_batch}"
+        logger.debug("Run " + str(runnumber) + " (array: " + array_range + ")")
+
+        scriptFilename = targetDirBatchfiles + "/sbatchScript_" + project + "_array.sh"
+        subs["%CONFIG_ID_END%"] = f"$((SLURM_ARRAY_TASK_ID + {num_runs_per_batch - 1}))"
+        subs["%RUN_ID%"] = str(runnumber)
+        renderedLines = []
+        for line in template.splitlines(keepends=True):
+            if not line.startswith("#SBATCH"):
+                subs["%CONFIG_ID_START%"] = "${SLURM_ARRAY_TASK_ID}"
+            elif SBATCH_LOG_RE.match(line):
+                subs["%CONFIG_ID_START%"] = "%a"
+            else:
+                # Other directives (e.g. the job name) are shared by all array tasks
+                line = line.replace("_C%CONFIG_ID_START%", "")
+                subs["%CONFIG_ID_START%"] = ""
+            renderedLines.append(PLACEHOLDER_RE.sub(lambda m: subs[m.group(0)], line))
+        with open(scriptFilename, "w", newline="\n") as script:
+            script.write("".join(renderedLines))
+        execLines.append(
             "mkdir -p "
             + settings.slurm.target_cluster_logfiles
             + "/"
@@ -203,19 +224,63 @@ def generate_script(args=sys.argv[1:]):
             + "/logs"
             + "\n"
         )
-        execScript.write(
-            "sbatch "
+        execLines.append(
+            "sbatch --array="
+            + array_range
+            + " "
             + f"~/ahoi/{runnumber}/"
             + settings.slurm.target_cluster_batchfiles
             + "/sbatchScript_"
             + project
-            + "_"
-            + str(k)
-            + ".sh\n"
+            + "_array.sh\n"
         )
-        if settings.output.simplenames:
-            runnumber = runnumber + 1
-    execScript.close()
+    else:
+        for k in range(config_id_start, config_id_end + 1, num_runs_per_batch):
+            logger.debug(
+                "Run "
+                + str(runnumber)
+                + " (ID: "
+                + str(k)
+                + ")"
+            )
+
+            scriptFilename = (
+                targetDirBatchfiles
+                + "/sbatchScript_"
+                + project
+                + "_"
+                + str(k)
+                + ".sh"
+            )
+            subs["%CONFIG_ID_START%"] = str(k)
+            subs["%CONFIG_ID_END%"] = str(k + num_runs_per_batch - 1)
+            subs["%RUN_ID%"] = str(runnumber)
+            rendered = PLACEHOLDER_RE.sub(lambda m: subs[m.group(0)], template)
+            with open(scriptFilename, "w", newline="\n") as script:
+                script.write(rendered)
+            execLines.append(
+                "mkdir -p "
+                + settings.slurm.target_cluster_logfiles
+                + "/"
+                + str(runnumber)
+                + "/logs"
+                + "\n"
+            )
+            execLines.append(
+                "sbatch "
+                + f"~/ahoi/{runnumber}/"
+                + settings.slurm.target_cluster_batchfiles
+                + "/sbatchScript_"
+                + project
+                + "_"
+                + str(k)
+                + ".sh\n"
+            )
+            if settings.output.simplenames:
+                runnumber = runnumber + 1
+
+    with open(execScriptFilename, "w", newline="\n") as execScript:
+        execScript.write("".join(execLines))
 
     st = os.stat(execScriptFilename)
     os.chmod(execScriptFilename, st.st_mode | stat.S_IEXEC)
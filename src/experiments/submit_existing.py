@@ -12,13 +12,14 @@ import os
 import logging
 import subprocess
 import sys
-import textwrap
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 
 # Import from your existing codebase
 from helpers.config import (
     settings, 
-    get_cluster_output_path
+    get_linux_cluster_output_path
 )
 
 # --- CONFIGURATION ---
@@ -26,6 +27,33 @@ EXCEL_COL_CONFIG_ID = "ID"
 EXCEL_COL_RUN_ID = "main.run_id"
 # ---------------------
 
+# Bash block emitted per config. It looks for:
+#   1. sbatchScript_AHOI_123.sh  (Standard ID)
+#   2. sbatchScript_AHOI_123-123.sh (Range format)
+_BLOCK_TMPL = """
+# --- Config {config_id} -> Run {run_id} ---
+TARGET_DIR="{path_hardcoded}"
+if [ ! -d "$TARGET_DIR" ]; then
+    TARGET_DIR="{path_standard}"
+fi
+
+if [ -d "$TARGET_DIR" ]; then
+    # SEARCH FOR THE SPECIFIC CONFIG ID FILE
+    # We look for files ending in _{config_id}.sh OR _{config_id}-*.sh
+    SCRIPT_FILE=$(find "$TARGET_DIR" -name "sbatchScript_*_{config_id}.sh" -o -name "sbatchScript_*_{config_id}-*.sh" | head -n 1)
+
+    if [ -n "$SCRIPT_FILE" ]; then
+        echo "Submitting matches for Config {config_id}: $SCRIPT_FILE"
+        dos2unix "$SCRIPT_FILE" > /dev/null 2>&1
+        sbatch "$SCRIPT_FILE"
+    else
+        echo "MISSING: Specific script for Config {config_id} not found in $TARGET_DIR"
+    fi
+else
+    echo "MISSING: Directory Run {run_id} not found"
+fi
+"""
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s', datefmt='%H:%M:%S')
 logger = logging.getLogger("ahoi.cluster.submit_existing")
 
@@ -42,46 +70,86 @@ def get_excel_path():
     logger.error(f"Could not find Excel file '{filename}'.")
     sys.exit(1)
 
+def _is_map_column(column):
+    return str(column).strip() in (EXCEL_COL_CONFIG_ID, EXCEL_COL_RUN_ID)
+
+@lru_cache(maxsize=8)
+def _load_scenario_table(path, mtime, size):
+    """
+    Reads the config ID and run ID columns of the scenario file.
+    Cached per (path, mtime, size), so the file is parsed again only if it changed.
+    """
+    if path.endswith('.csv'):
+        df = pd.read_csv(path, usecols=_is_map_column)
+    elif path.endswith('.parquet'):
+        df = pd.read_parquet(path, columns=[EXCEL_COL_CONFIG_ID, EXCEL_COL_RUN_ID])
+    else:
+        # openpyxl only reads .xlsx/.xlsm; let pandas pick the engine for .xls and others
+        engine = "openpyxl" if path.endswith(('.xlsx', '.xlsm')) else None
+        df = pd.read_excel(path, engine=engine, usecols=_is_map_column)
+    df.columns = df.columns.str.strip()
+    return df
+
+@lru_cache(maxsize=8)
+def _read_xlsx_run_id_map(path, mtime, size, start_id, end_id):
+    """
+    Streams the rows of an .xlsx scenario sheet with openpyxl (read-only, cached values),
+    so the full sheet is never loaded into a DataFrame. All rows are checked, as the
+    config IDs need not be sorted and may be stored as text.
+    Cached per (path, mtime, size, start_id, end_id).
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else "" for cell in next(rows, ())]
+        if EXCEL_COL_CONFIG_ID not in header or EXCEL_COL_RUN_ID not in header:
+            logger.error(f"Missing columns. Found: {header}")
+            sys.exit(1)
+        i_config = header.index(EXCEL_COL_CONFIG_ID)
+        i_run = header.index(EXCEL_COL_RUN_ID)
+
+        run_id_map = {}
+        for row in rows:
+            config_id = row[i_config]
+            if config_id is None:
+                continue
+            config_id = int(config_id)
+            if start_id <= config_id <= end_id:
+                run_id_map[config_id] = int(row[i_run])
+        return run_id_map
+    finally:
+        wb.close()
+
 def preload_run_id_map(start_id, end_id):
     excel_path = get_excel_path()
     logger.info(f"Reading Excel map from: {excel_path}")
     try:
-        if excel_path.endswith('.csv'):
-            df = pd.read_csv(excel_path)
-        else:
-            df = pd.read_excel(excel_path)
-        df.columns = df.columns.str.strip()
+        if excel_path.endswith('.xlsx'):
+            run_id_map = _read_xlsx_run_id_map(
+                excel_path, os.path.getmtime(excel_path), os.path.getsize(excel_path), start_id, end_id
+            )
+            return dict(run_id_map)
+
+        df = _load_scenario_table(excel_path, os.path.getmtime(excel_path), os.path.getsize(excel_path))
         
         if EXCEL_COL_CONFIG_ID not in df.columns or EXCEL_COL_RUN_ID not in df.columns:
             logger.error(f"Missing columns. Found: {df.columns.tolist()}")
             sys.exit(1)
 
-        mask = (df[EXCEL_COL_CONFIG_ID] >= start_id) & (df[EXCEL_COL_CONFIG_ID] <= end_id)
-        filtered_df = df.loc[mask]
+        filtered_df = df.loc[
+            df[EXCEL_COL_CONFIG_ID].between(start_id, end_id),
+            [EXCEL_COL_CONFIG_ID, EXCEL_COL_RUN_ID]
+        ]
         
-        return dict(zip(
-            filtered_df[EXCEL_COL_CONFIG_ID], 
-            filtered_df[EXCEL_COL_RUN_ID].astype(int)
-        ))
+        config_ids = filtered_df[EXCEL_COL_CONFIG_ID].to_numpy()
+        run_ids = filtered_df[EXCEL_COL_RUN_ID].to_numpy(dtype=np.int64)
+        return dict(zip(config_ids.tolist(), run_ids.tolist()))
     except Exception as e:
         logger.error(f"Failed to read scenario file: {e}")
         sys.exit(1)
 
-def sanitize_path_for_linux(path_str):
-    """
-    Converts Windows paths and Tildes to Linux-friendly format.
-    Example: '~\ahoi\0' -> '$HOME/ahoi/0'
-    """
-    # 1. Replace backslashes with forward slashes (Windows fix)
-    clean = path_str.replace("\\", "/")
-    
-    # 2. Replace tilde with $HOME (Bash quote fix)
-    # Note: We use ${HOME} to be safe in all contexts
-    if clean.startswith("~"):
-        clean = clean.replace("~", "${HOME}", 1)
-        
-    return clean
-
 def generate_bulk_submission_script(start_id, end_id, meta_script_name="bulk_submit_generated.sh"):
     
     run_id_map = preload_run_id_map(start_id, end_id)
@@ -94,7 +162,7 @@ def generate_bulk_submission_script(start_id, end_id, meta_script_name="bulk_sub
         ""
     ]
 
-    count = 0
+    rows = []
 
     for config_id in range(start_id, end_id + 1):
         
@@ -105,48 +173,21 @@ def generate_bulk_submission_script(start_id, end_id, meta_script_name="bulk_sub
         
         # 1. Get Standard Path (and sanitize it)
         settings.main.run_id = current_run_id
-        raw_path_standard = get_cluster_output_path(runid=current_run_id, subfolder="")
-        path_standard = sanitize_path_for_linux(raw_path_standard)
+        path_standard = get_linux_cluster_output_path(runid=current_run_id, subfolder="")
         
         # 2. Get Hardcoded Path (and sanitize it)
         path_hardcoded = f"${{HOME}}/ahoi/{current_run_id}"
         
-        # We inject the {config_id} directly into the 'find' command.
-        # It looks for:
-        #   1. sbatchScript_AHOI_123.sh  (Standard ID)
-        #   2. sbatchScript_AHOI_123-123.sh (Range format)
-        bash_block = textwrap.dedent(f"""
-            # --- Config {config_id} -> Run {current_run_id} ---
-            TARGET_DIR="{path_hardcoded}"
-            if [ ! -d "$TARGET_DIR" ]; then
-                TARGET_DIR="{path_standard}"
-            fi
-            
-            if [ -d "$TARGET_DIR" ]; then
-                # SEARCH FOR THE SPECIFIC CONFIG ID FILE
-                # We look for files ending in _{config_id}.sh OR _{config_id}-*.sh
-                SCRIPT_FILE=$(find "$TARGET_DIR" -name "sbatchScript_*_{config_id}.sh" -o -name "sbatchScript_*_{config_id}-*.sh" | head -n 1)
-                
-                if [ -n "$SCRIPT_FILE" ]; then
-                    echo "Submitting matches for Config {config_id}: $SCRIPT_FILE"
-                    dos2unix "$SCRIPT_FILE" > /dev/null 2>&1
-                    sbatch "$SCRIPT_FILE"
-                else
-                    echo "MISSING: Specific script for Config {config_id} not found in $TARGET_DIR"
-                fi
-            else
-                echo "MISSING: Directory Run {current_run_id} not found"
-            fi
-        """)
-
-        lines.append(bash_block)
-        
-        count += 1
-        if count % 50 == 0:
-             sys.stdout.write(f"\rProcessed {count} configs...")
-             sys.stdout.flush()
-
-    print("")
+        # The {config_id} is injected directly into the 'find' command
+        rows.append({
+            "config_id": config_id,
+            "run_id": current_run_id,
+            "path_hardcoded": path_hardcoded,
+            "path_standard": path_standard,
+        })
+
+    lines.extend(_BLOCK_TMPL.format(**row) for row in rows)
+    logger.info(f"Processed {len(rows)} configs.")
     lines.append("echo 'Bulk submission complete.'")
 
     with open(meta_script_name, "w", encoding="utf-8", newline='\n') as f:
@@ -32,6 +32,7 @@ import pandas as pd
 import os
 import logging.config
 import pathlib
+from functools import lru_cache
 import datetime
 import gitinfo
 from helpers.information import get_git_version
@@ -54,8 +55,9 @@ logger = logging.getLogger("ahoi")
 def settings_loader(settings, filename, config_id, delimiter=","):
     """
     This function serves as a custom loader for Dynaconf. It reads a specified
-    Excel file, finds the row matching the given `config_id`, and updates the
-    `settings` object with the values from that row. String values containing
+    Excel file (or a Parquet file, e.g. the SA settings written by
+    `prepare_sa_settings.py`), finds the row matching the given `config_id`, and
+    updates the `settings` object with the values from that row. String values containing
     the specified delimiter are automatically split into lists.
 
     Parameters
@@ -63,7 +65,7 @@ def settings_loader(settings, filename, config_id, delimiter=","):
     settings: Dynaconf
         The Dynaconf settings object to be updated.
     filename: str
-        The path to the Excel scenario file.
+        The path to the Excel (or `.parquet`) scenario file.
     config_id: int
         The ID of the configuration row to load from the Excel file.
     delimiter: str, optional
@@ -83,8 +85,11 @@ def settings_loader(settings, filename, config_id, delimiter=","):
             pass
         return cleaned_item
     
-    # Read the Excel file
-    df = pd.read_excel(filename, sheet_name="Sheet1")
+    # Read the scenario file (Parquet: only the matching row is loaded)
+    if filename.endswith(".parquet"):
+        df = pd.read_parquet(filename, filters=[("ID", "==", config_id)])
+    else:
+        df = pd.read_excel(filename, sheet_name="Sheet1")
     
     # Filter the DataFrame for the specified config ID
     matching_rows = df[df['ID'] == config_id]
@@ -353,3 +358,44 @@ def get_cluster_output_path(
     return str(pathlib.Path(os.path.join(opath, subfolder)).as_posix())
 
 
+def sanitize_path_for_linux(path_str):
+    """
+    Converts Windows paths and Tildes to Linux-friendly format.
+    Example: '~\\ahoi\\0' -> '${HOME}/ahoi/0'
+    """
+    # 1. Replace backslashes with forward slashes (Windows fix)
+    clean = path_str.replace("\\", "/")
+
+    # 2. Replace tilde with ${HOME} (Bash quote fix)
+    if clean.startswith("~"):
+        clean = clean.replace("~", "${HOME}", 1)
+
+    return clean
+
+
+@lru_cache(maxsize=None)
+def _linux_cluster_output_path(mainpath, task, runid, subfolder):
+    return sanitize_path_for_linux(get_cluster_output_path(runid=runid, subfolder=subfolder))
+
+
+def get_linux_cluster_output_path(runid=settings.main.run_id, subfolder=None):
+    """
+    Returns the cluster output path sanitized by `sanitize_path_for_linux`.
+    Results are cached per cluster main path, task, run ID and subfolder.
+
+    Parameters
+    ----------
+    runid: int
+        the run ID the output data is associated with
+    subfolder: str
+        last part of the output folder
+
+    Returns
+    -------
+
+    str:
+        sanitized cluster output path
+    """
+    return _linux_cluster_output_path(
+        settings.slurm.target_cluster_mainpath, settings.main.task, runid, subfolder
+    )
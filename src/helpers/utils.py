@@ -14,10 +14,11 @@ data formats, and implementing specific model-related calculations.
 import importlib
 import sys
 import os
+import pickle
 import pandas as pd
 import itertools
+from functools import lru_cache
 from helpers.config import settings, get_output_path, config_logging
-import glob
 import logging
 
 # Dynamically add the 'modules/' folder to sys.path
@@ -120,14 +121,21 @@ def pickle_to_hdf5(resulttype="model"):
     run_ids=settings.scenario_comparison.run_ids
     files_prefixes=settings.scenario_comparison.files_prefixes
     
+    scenario_ids = {scenario: load_class("Scenario", scenario).id for scenario in scenarios}
+    # List each pickle folder once and match file names in memory
+    pickle_files = {}
+    for run_id in run_ids:
+        pickle_path = get_output_path(runid=run_id, subfolder='pickles')
+        with os.scandir(pickle_path) as entries:
+            pickle_files[run_id] = [(entry.name, entry.path) for entry in entries
+                                    if entry.name.endswith(".pkl") and entry.is_file()]
+    
     with pd.HDFStore(os.path.join(
             get_output_path(runid=run_ids[0], subfolder='hdf5'),
             settings.output.hdf5_filename)) as hdf:
         for scenario, run_id, files_prefix in itertools.product(scenarios, run_ids, files_prefixes):
-                scenario_id = load_class("Scenario", scenario).id
-                pickle_path = get_output_path(runid=run_id, subfolder='pickles')
-                pattern = f"{pickle_path}/{resulttype}_df_{files_prefix}_{scenario_id}_{run_id}_*.pkl"
-                model_files = glob.glob(pattern)
+                prefix = f"{resulttype}_df_{files_prefix}_{scenario_ids[scenario]}_{run_id}_"
+                model_files = [path for name, path in pickle_files[run_id] if name.startswith(prefix)]
                 
                 for file in model_files:
                     try:
@@ -180,7 +188,171 @@ def influence_by_relative_agreement(source_system, target_system, exposure = 1):
             value[1] = max(new_u, 1e-6)
 
     
+@lru_cache(maxsize=None)
+def get_pickle_folder(run_id):
+    """
+    Memoized `get_output_path(runid=run_id, subfolder='pickles')`.
+
+    Parameters
+    ----------
+    run_id : int
+        Run ID of the parameter set.
+
+    Returns
+    -------
+    str
+        Path of the run's pickle folder.
+    """
+    return get_output_path(runid=run_id, subfolder='pickles')
+
+
+def index_pickle_folders(run_ids, files_prefix):
+    """
+    Scans the pickle folder of every run once and indexes the model pickles
+    named `model_df_{files_prefix}_*_{seed_sequence}.pkl` by seed sequence.
+
+    Parameters
+    ----------
+    run_ids : iterable
+        Run IDs whose pickle folders should be scanned.
+    files_prefix : str
+        Prefix of the model output files.
+
+    Returns
+    -------
+    dict
+        Maps run ID to a dict of seed sequence -> list of pickle file paths.
+        Callers decide how to treat several files for one seed.
+    """
+    prefix = f"model_df_{files_prefix}_"
+    folder_cache = {}
+    folder_index = {}
+    for run_id in run_ids:
+        pickle_folder = get_pickle_folder(run_id)
+        if pickle_folder not in folder_cache:
+            files = {}
+            if os.path.isdir(pickle_folder):
+                with os.scandir(pickle_folder) as entries:
+                    for entry in entries:
+                        name = entry.name
+                        if not (name.startswith(prefix) and name.endswith('.pkl')):
+                            continue
+                        _, sep, seed_sequence = name[len(prefix):-len('.pkl')].rpartition('_')
+                        if sep:
+                            files.setdefault(seed_sequence, []).append(entry.path)
+            folder_cache[pickle_folder] = files
+        folder_index[run_id] = folder_cache[pickle_folder]
+    return folder_index
+
+
+# Sidecar files caching only the last row of a model output pickle.
+# (Not '.pkl', so that the `*.pkl` patterns of the analysis scripts do not pick them up.)
+LAST_ROW_SUFFIX = '_last.pickle'
+
+
+def _last_row_sidecar_path(file_path):
+    return os.path.splitext(file_path)[0] + LAST_ROW_SUFFIX
+
+
+def _source_signature(file_path):
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def write_last_row_sidecars(folder, files_prefix="model_df_"):
+    """
+    Writes a `{name}_last.pickle` sidecar with the last row of each model output
+    pickle in the given folder, so that later calls of `read_last_row` do not
+    need to load the full DataFrames.
+
+    Each sidecar stores the size and modification time of its source pickle.
+    Sidecars whose stored values still match are kept.
+
+    Parameters
+    ----------
+    folder : str
+        Folder of the model output pickles.
+    files_prefix : str, optional
+        Prefix of the pickle file names to process, by default "model_df_".
+
+    Returns
+    -------
+    int
+        Number of sidecars written.
+    """
+    written = 0
+    with os.scandir(folder) as entries:
+        file_paths = [entry.path for entry in entries
+                      if entry.name.startswith(files_prefix) and entry.name.endswith(".pkl")
+                      and entry.is_file()]
+    for file_path in file_paths:
+        signature = _source_signature(file_path)
+        sidecar_path = _last_row_sidecar_path(file_path)
+        try:
+            with open(sidecar_path, 'rb') as f:
+                if pickle.load(f)['source'] == signature:
+                    continue
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError, TypeError):
+            pass
+
+        output_df = pd.read_pickle(file_path)
+        if output_df.empty:
+            continue
+        last_row = output_df.iloc[-1].to_dict()
+        del output_df
+        with open(sidecar_path, 'wb') as f:
+            pickle.dump({'source': signature, 'row': last_row}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        written += 1
+    logger.info(f"Wrote {written} last-row sidecars in {folder}")
+    return written
+
+
+def read_last_row(file_path, columns):
+    """
+    Reads the requested columns of the last row of a model output pickle.
+
+    The `{name}_last.pickle` sidecar written by `write_last_row_sidecars` is
+    used if the size and modification time it stores match the pickle.
+    Otherwise the full pickled DataFrame is read.
+
+    Parameters
+    ----------
+    file_path : str
+        Path of the model output pickle.
+    columns : list
+        Column names that are needed from the last row.
+
+    Returns
+    -------
+    dict
+        The requested columns of the last row that exist in the file, or None
+        if the file holds no rows.
+    """
+    try:
+        with open(_last_row_sidecar_path(file_path), 'rb') as f:
+            sidecar = pickle.load(f)
+        if sidecar['source'] == _source_signature(file_path):
+            last_row = sidecar['row']
+            return {c: last_row[c] for c in columns if c in last_row}
+    except (OSError, pickle.UnpicklingError, EOFError, KeyError, TypeError):
+        pass
+
+    output_df = pd.read_pickle(file_path)
+    if output_df.empty:
+        return None
+    # Keep only the last row and release the full frame right away
+    last_row = output_df.iloc[-1].to_dict()
+    del output_df
+    return {c: last_row[c] for c in columns if c in last_row}
+
+
 if __name__ == '__main__':
     config_logging()                        
-    pickle_to_hdf5()      
+    if len(sys.argv) > 1:
+        # python utils.py <pickle folder> ...: write the last-row sidecars once
+        for folder in sys.argv[1:]:
+            write_last_row_sidecars(folder)
+    else:
+        pickle_to_hdf5()      
         
\ No newline at end of file
@@ -0,0 +1,139 @@
+"""
+Unit tests for helpers of the sensitivity analysis scripts.
+
+The analysis modules are imported per test with `pytest.importorskip`, so a
+missing optional dependency of one script only skips its own tests.
+"""
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def test_convert_counts_to_rates_empty_pool():
+    """
+    Rates are conditional on the previous stage and capped at 1. Once a pool
+    runs empty, all later stages of that option get a rate of 0. Options with
+    other stages and non-dict entries are converted independently.
+    """
+    gp_metamodel = pytest.importorskip("analysis.analyse_sa_gp_metamodel_sobol")
+    stages = ['Aware', 'Considered', 'Planned', 'Installed']
+    root_dict = {
+        'Heat pump': dict(zip(stages, [8, 0, 3, 2])),
+        'Gas': dict(zip(stages, [10, 4, 4, 1])),
+        'Pellet': dict(zip(stages, [600, 5, 7, 0])),
+        'Electric': {'Aware': 3, 'Installed': 0},
+        'Total': 17,
+    }
+    result = gp_metamodel.convert_counts_to_rates(root_dict, 10)
+
+    assert list(result) == list(root_dict)
+    assert result['Heat pump'] == pytest.approx(dict(zip(stages, [0.8, 0.0, 0.0, 0.0])))
+    assert result['Gas'] == pytest.approx(dict(zip(stages, [1.0, 0.4, 1.0, 0.25])))
+    assert result['Pellet'] == pytest.approx(dict(zip(stages, [1.0, 5 / 600, 1.0, 0.0])))
+    assert result['Electric'] == pytest.approx({'Aware': 0.3, 'Installed': 0.0})
+    assert result['Total'] == 17
+
+    empty_pool = gp_metamodel.convert_counts_to_rates(root_dict, 0)
+    assert empty_pool['Gas'] == pytest.approx(dict.fromkeys(stages, 0.0))
+
+
+def test_grouped_statistics_matches_groupby_agg():
+    """
+    NaNs are skipped per column, all-NaN groups and single-seed groups give
+    NaN, and a zero mean gives a CV of 0, as with `groupby().agg()`.
+    """
+    summary = pytest.importorskip("analysis.analyse_sa_summary")
+    nan = np.nan
+    df = pd.DataFrame({
+        'Run_id': [3, 1, 3, 1, 2, 3, 1, 4],
+        'a': [0.5, 1.0, nan, 3.0, 7.0, 2.5, 2.0, 0.0],
+        'b': [nan, 4.0, nan, nan, 1.0, nan, 6.0, 0.0],
+        'c': [1.0, -1.0, 2.0, 1.0, nan, 0.0, 0.0, 5.0],
+    })
+    value_cols = ['a', 'b', 'c']
+    run_ids, stats = summary.grouped_statistics(df['Run_id'].to_numpy(),
+                                                df[value_cols].to_numpy(dtype=float))
+
+    def mad(x):
+        return (x - x.mean()).abs().mean()
+    def p10(x):
+        return x.quantile(0.10)
+    def p90(x):
+        return x.quantile(0.90)
+    def cv(x):
+        return 0.0 if x.mean() == 0 else x.std() / x.mean()
+    expected = df.groupby('Run_id')[value_cols].agg(['mean', 'median', 'std', 'min', 'max',
+                                                     mad, p10, p90, cv])
+
+    np.testing.assert_array_equal(run_ids, expected.index.to_numpy())
+    for col_idx, col in enumerate(value_cols):
+        np.testing.assert_allclose(stats[:, col_idx, :], expected[col].to_numpy(dtype=float),
+                                   equal_nan=True)
+
+
+def test_index_model_files_prefix_with_underscores(tmp_path):
+    """
+    File names are split from the right, so prefixes may contain underscores,
+    while sidecars and other dataframes are ignored.
+    """
+    statistical_testing = pytest.importorskip("analysis.statistical_testing")
+    names = [
+        'model_df_DEZ_Baseline_1_5_11111111.pkl',
+        'model_df_DEZ_Baseline_1_5_22222222.pkl',
+        'model_df_DEZ_Baseline_1_50_11111111.pkl',
+        'model_df_DEZ_Base_line_v2_3_7_33333333.pkl',
+        'model_df_Plain_1_5_11111111.pkl',
+        'model_df_DEZ_Baseline_1_5_11111111_last.pickle',
+        'agent_df_DEZ_Baseline_1_5_11111111.pkl',
+    ]
+    for name in names:
+        (tmp_path / name).touch()
+
+    grouped = statistical_testing.index_model_files(str(tmp_path))
+
+    assert {key: sorted(os.path.basename(p) for p in paths) for key, paths in grouped.items()} == {
+        ('DEZ_Baseline', '1', '5'): names[:2],
+        ('DEZ_Baseline', '1', '50'): [names[2]],
+        ('DEZ_Base_line_v2', '3', '7'): [names[3]],
+        ('Plain', '1', '5'): [names[4]],
+    }
+    assert statistical_testing.index_model_files(str(tmp_path / 'missing')) == {}
+
+
+@pytest.mark.parametrize("num_vars", [1, 2, 5, 10])
+def test_full_factorial_design_matches_ff2n(num_vars):
+    """
+    The bitwise design has the levels and row order of pyDOE2's ff2n.
+    """
+    prepare_sa_settings = pytest.importorskip("analysis.prepare_sa_settings")
+    pyDOE2 = pytest.importorskip("pyDOE2")
+    design_bits = prepare_sa_settings.full_factorial_design(num_vars)
+
+    assert design_bits.shape == (2**num_vars, num_vars)
+    np.testing.assert_array_equal(design_bits.astype(int) * 2 - 1, pyDOE2.ff2n(num_vars))
+
+
+def test_last_row_sidecar_tracks_source_size_and_mtime(tmp_path):
+    """
+    A sidecar is used only while the size and modification time it stores
+    match the pickle, even if the pickle was replaced by an older file.
+    """
+    utils = pytest.importorskip("helpers.utils")
+    file_path = str(tmp_path / 'model_df_DEZ_Baseline_1_5_11111111.pkl')
+    pd.DataFrame({'a': [1.0, 2.0], 'b': [3.0, 4.0]}).to_pickle(file_path)
+
+    assert utils.write_last_row_sidecars(str(tmp_path)) == 1
+    assert utils.write_last_row_sidecars(str(tmp_path)) == 0
+    os.remove(file_path)
+    pd.DataFrame({'a': [1.0, 5.0], 'b': [3.0, 6.0]}).to_pickle(file_path)
+    os.utime(file_path, ns=(0, 0))
+    with open(utils._last_row_sidecar_path(file_path), 'wb') as f:
+        pickle.dump({'source': utils._source_signature(file_path), 'row': {'a': -1.0}}, f)
+    assert utils.read_last_row(file_path, ['a', 'c']) == {'a': -1.0}
+
+    # Same size as an older copy from e.g. `rsync -a`, but another mtime
+    os.utime(file_path, ns=(10**9, 10**9))
+    assert utils.read_last_row(file_path, ['a', 'c']) == {'a': 5.0}